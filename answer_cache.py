@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from oplog import atomic_write_json
+from tokenizer import normalize_text
+
+# 질문 끝의 물음표/마침표 등은 같은 질문으로 취급
+_TRAILING_PUNCT_RE = re.compile(r"[\s?!.。？！~]+$")
+
+
+def normalize_question(question: str) -> str:
+    """캐시 키용 질문 정규화 (normalize_text 후 끝 문장부호 제거)"""
+    return _TRAILING_PUNCT_RE.sub("", normalize_text(question))
+
+
+def doc_version(doc: Dict) -> str:
+    """검색 결과 문서의 내용 버전 (제목/내용/카테고리/태그가 바뀌면 달라짐)"""
+    fields = [doc.get("title", ""), doc.get("content", ""), doc.get("category", ""), doc.get("tags", "")]
+    return hashlib.sha256(json.dumps(fields, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+class AnswerCache:
+    """Gemini 답변 캐시
+
+    키는 모델 이름 + 정규화된 질문 + 검색된 문서들의 (id, 내용 버전)이므로 문서나
+    모델이 바뀌면 자동으로 다른 키가 됩니다. LRU(max_entries)와 TTL(ttl_seconds)로 정리하고
+    변경마다 디스크(JSON)에 저장해 재시작 후에도 유지됩니다.
+    """
+
+    def __init__(self, path: str = "./answer_cache.json", max_entries: int = 256,
+                 ttl_seconds: float = 7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()  # 키 → {"answer", "question", "docs", "created_at"}
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(question: str, docs: List[Dict], model: str) -> str:
+        parts = [model, normalize_question(question)] + [f"{doc['id']}@{doc_version(doc)}" for doc in docs]
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get("entries", [])
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable answer cache: {e}")
+            return
+        now = time.time()
+        for entry in entries:
+            if now - entry["created_at"] <= self.ttl_seconds:
+                self._entries[entry["key"]] = entry
+
+    def _save(self):
+        try:
+            atomic_write_json(self.path, {"entries": list(self._entries.values())}, indent=None)
+        except OSError as e:
+            print(f"Error saving answer cache: {e}")
+
+    def get(self, question: str, docs: List[Dict], model: str) -> Optional[str]:
+        """model이 같은 자료로 만든 캐시된 답변 (없거나 만료되면 None)"""
+        key = self.make_key(question, docs, model)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry["created_at"] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["answer"]
+
+    def put(self, question: str, docs: List[Dict], answer: str, model: str):
+        """답변 저장 (가장 오래 쓰지 않은 항목부터 max_entries까지 정리)"""
+        key = self.make_key(question, docs, model)
+        with self._lock:
+            self._entries[key] = {
+                "key": key,
+                "model": model,
+                "question": question,
+                "docs": [doc["id"] for doc in docs],
+                "answer": answer,
+                "created_at": time.time(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def invalidate_doc(self, doc_id: str) -> int:
+        """doc_id를 근거로 한 답변 삭제 (삭제한 개수)"""
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if doc_id in entry["docs"]]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._save()
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._save()
@@ -1,11 +1,14 @@
 import streamlit as st
-import json
-import base64
-import requests
-import os
 import time
 from datetime import datetime, timedelta
 
+from answer_cache import AnswerCache
+from gemini_stream import FakeGenerativeModel, StreamedAnswer
+from github_manager import GitHubManager
+from knowledge_manager import KnowledgeManager
+from knowledge_service import KnowledgeService
+from usage_tracker import UsageTracker
+
 # Gemini API 추가
 try:
     import google.generativeai as genai
@@ -31,45 +34,47 @@ if GEMINI_AVAILABLE:
     except Exception:
         pass
 
-# API 사용량 추적
-USAGE_FILE = "api_usage.json"
+GEMINI_MODEL_NAME = "gemini-2.0-flash-exp"
 
-def load_usage():
-    if os.path.exists(USAGE_FILE):
-        try:
-            with open(USAGE_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            pass
-    return {"count": 0, "date": datetime.now().date().isoformat()}
+# 오프라인 확인용: Secrets에 GEMINI_FAKE_MODEL = true 이면 가짜 모델로 답변
+# (가짜 답변은 답변 캐시에 넣지 않고 AI 사용량에도 세지 않음)
+use_fake_model = bool(st.secrets.get("GEMINI_FAKE_MODEL", False))
+if use_fake_model:
+    use_gemini = True
+model_name = "fake" if use_fake_model else GEMINI_MODEL_NAME
 
-def save_usage(usage_data):
-    try:
-        with open(USAGE_FILE, 'w') as f:
-            json.dump(usage_data, f)
-    except:
-        pass
+def create_model():
+    if use_fake_model:
+        return FakeGenerativeModel()
+    return genai.GenerativeModel(GEMINI_MODEL_NAME)
 
-def increment_usage():
-    usage = load_usage()
-    current_date = datetime.now().date().isoformat()
-    
-    if usage["date"] != current_date:
-        usage = {"count": 0, "date": current_date}
-    
-    usage["count"] += 1
-    save_usage(usage)
-    return usage["count"]
+# 편집 화면 한 페이지에 보여줄 문서 수
+EDIT_PAGE_SIZE = 50
+
+# AI 프롬프트에 넣을 검색 자료의 최대 글자 수
+CONTEXT_CHAR_BUDGET = int(st.secrets.get("CONTEXT_CHAR_BUDGET", 3000))
+
+# API 사용량 추적 (프로세스 공유, 한도 확인은 메모리 값으로)
+@st.cache_resource
+def get_usage_tracker():
+    return UsageTracker("api_usage.json")
+
+usage_tracker = get_usage_tracker()
 
 # 자동 백업 설정
 AUTO_BACKUP_INTERVAL = 30  # 30분 간격
-AUTO_BACKUP_KEY = "last_auto_backup"
+AUTO_BACKUP_KEY = "last_auto_backup"  # 마지막으로 백업이 성공(또는 변경 없음)한 시각
+AUTO_BACKUP_RETRY_KEY = "auto_backup_retry_at"
+AUTO_BACKUP_RETRY_SECONDS = 60  # 실패하거나 거절된 자동 백업을 다시 시도하기까지의 간격
 
 def should_auto_backup():
     """자동 백업이 필요한지 확인"""
     try:
+        retry_at = st.session_state.get(AUTO_BACKUP_RETRY_KEY)
+        if retry_at is not None and datetime.now() < retry_at:
+            return False
+        
         if AUTO_BACKUP_KEY not in st.session_state:
-            st.session_state[AUTO_BACKUP_KEY] = datetime.now()
             return True
         
         last_backup = st.session_state[AUTO_BACKUP_KEY]
@@ -92,7 +97,7 @@ def perform_auto_backup():
             return False
         
         # 데이터 변경이 있는 경우에만 백업
-        current_docs = len(st.session_state.knowledge_db["documents"])
+        current_docs = service.count()
         if current_docs == 0:
             return False
         
@@ -101,187 +106,108 @@ def perform_auto_backup():
         
         if "성공" in result:
             st.session_state[AUTO_BACKUP_KEY] = datetime.now()
+            st.session_state.pop(AUTO_BACKUP_RETRY_KEY, None)
             # 조용한 알림 (너무 방해하지 않게)
             with st.sidebar:
                 st.success("🔄 자동 백업 완료", icon="✅")
             return True
         else:
-            # 실패 시에도 시간 업데이트 (무한 재시도 방지)
-            st.session_state[AUTO_BACKUP_KEY] = datetime.now()
+            # 실패(GitHub 갱신 중 거절 포함) 시 마지막 백업 시각은 그대로 두고 잠시 후 다시 시도
+            st.session_state[AUTO_BACKUP_RETRY_KEY] = datetime.now() + timedelta(seconds=AUTO_BACKUP_RETRY_SECONDS)
             return False
             
     except Exception as e:
-        st.session_state[AUTO_BACKUP_KEY] = datetime.now()
+        st.session_state[AUTO_BACKUP_RETRY_KEY] = datetime.now() + timedelta(seconds=AUTO_BACKUP_RETRY_SECONDS)
         return False
 
-# 세션 상태 초기화
-if 'knowledge_db' not in st.session_state:
-    st.session_state.knowledge_db = {
-        "documents": {},
-        "last_updated": datetime.now().isoformat()
-    }
+# 프로세스 공유 지식 서비스 (모든 세션이 하나의 KnowledgeManager/검색 색인을 공유)
+DEFAULT_GITHUB_REPO = "radpushman/Knowledge_for_CT_Room_Staff"
 
-# 앱 시작 시 GitHub 자동 복원 (간단 버전)
-if 'restored' not in st.session_state:
-    try:
-        token = st.secrets.get("GITHUB_TOKEN")
-        if token:
-            url = f"https://api.github.com/repos/radpushman/Knowledge_for_CT_Room_Staff/contents/ct_knowledge_backup.json"
-            headers = {"Authorization": f"Bearer {token}"}
-            
-            response = requests.get(url, headers=headers, timeout=5)
-            if response.status_code == 200:
-                file_info = response.json()
-                content_response = requests.get(file_info["download_url"], timeout=5)
-                if content_response.status_code == 200:
-                    backup_data = json.loads(content_response.text)
-                    if "knowledge_db" in backup_data:
-                        st.session_state.knowledge_db = backup_data["knowledge_db"]
-                        st.success(f"✅ GitHub에서 {len(backup_data['knowledge_db']['documents'])}개 지식 복원!")
-    except:
-        pass  # 복원 실패해도 무시
-    
-    # 복원 실패하거나 지식이 없으면 기본 지식 로드
-    if len(st.session_state.knowledge_db["documents"]) == 0:
-        default_docs = [
-            {
-                "title": "CT 스캔 기본 프로토콜",
-                "category": "프로토콜",
-                "content": "CT 스캔의 기본적인 촬영 순서와 환자 준비사항입니다.\n\n1. 환자 확인 및 동의서 작성\n2. 금속 제거 확인\n3. 조영제 주입 여부 확인\n4. 환자 위치 설정\n5. 스캔 범위 설정\n6. 촬영 실시",
-                "tags": "기본, 프로토콜, 촬영"
-            },
-            {
-                "title": "조영제 부작용 대응", 
-                "category": "응급상황",
-                "content": "조영제 투여 후 발생할 수 있는 부작용과 대응방법입니다.\n\n**경미한 반응:**\n- 구역, 구토\n- 두드러기\n- 가려움\n\n**중증 반응:**\n- 호흡곤란\n- 혈압 저하\n- 의식 저하\n\n즉시 의료진 호출 및 응급처치 실시",
-                "tags": "조영제, 응급, 부작용"
-            }
-        ]
-        
-        for i, doc in enumerate(default_docs):
-            doc_id = f"default_{i+1}"
-            st.session_state.knowledge_db["documents"][doc_id] = {
-                "id": doc_id,
-                "title": doc["title"],
-                "content": doc["content"],
-                "category": doc["category"],
-                "tags": doc["tags"],
-                "created_at": datetime.now().isoformat()
-            }
+@st.cache_resource
+def get_knowledge_service():
+    token = st.secrets.get("GITHUB_TOKEN")
+    github = GitHubManager(token, st.secrets.get("GITHUB_REPO", DEFAULT_GITHUB_REPO)) if token else None
+    # SEARCH_MODE = "hybrid" 이면 키워드 검색에 의미(벡터) 검색을 RRF로 결합
+    return KnowledgeService(KnowledgeManager(search_mode=st.secrets.get("SEARCH_MODE", "keyword")), github)
+
+service = get_knowledge_service()
+
+# Gemini 답변 캐시 (프로세스 공유, 디스크에 저장)
+@st.cache_resource
+def get_answer_cache():
+    return AnswerCache()
+
+answer_cache = get_answer_cache()
+
+# 앱 시작 시 로컬 데이터로 즉시 시작하고 GitHub 복원은 백그라운드에서 (프로세스당 1회)
+service.start()
+
+@st.fragment(run_every=2 if service.sync_state == KnowledgeService.SYNC_REFRESHING else None)
+def show_sync_status():
+    """GitHub 동기화 상태 표시 (갱신이 끝나면 화면 전체를 새 데이터로 다시 그림)"""
+    state = service.sync_state
+    seen = st.session_state.get("sync_state_seen")
+    st.session_state["sync_state_seen"] = state
+    if seen == KnowledgeService.SYNC_REFRESHING and state != seen:
+        st.rerun()
     
-    st.session_state.restored = True
+    if state == KnowledgeService.SYNC_REFRESHING:
+        st.info("🔄 GitHub에서 최신 지식을 불러오는 중... (로컬 사본 표시 중)")
+    elif state == KnowledgeService.SYNC_STALE:
+        st.warning(f"⚠️ GitHub 동기화 실패 - 로컬 사본 표시 중\n\n{service.sync_error or ''}")
+        if st.button("🔄 다시 시도", key="retry_sync"):
+            service.refresh_async()
+            st.rerun()
+    elif state == KnowledgeService.SYNC_FRESH and service.refreshed_count and not st.session_state.get("sync_notified"):
+        st.session_state["sync_notified"] = True
+        st.success(f"✅ GitHub에서 {service.refreshed_count}개 지식 복원!")
+
+with st.sidebar:
+    show_sync_status()
 
-# 자동 백업 체크 (앱 로드 시)
-if 'auto_backup_checked' not in st.session_state:
-    if should_auto_backup():
-        perform_auto_backup()
-    st.session_state.auto_backup_checked = True
+# 자동 백업 체크 (화면을 그릴 때마다, 간격이 지났거나 재시도할 때만 실행)
+if should_auto_backup():
+    perform_auto_backup()
 
 # 지식 관리 함수들
 def add_knowledge(title, content, category, tags):
-    doc_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{abs(hash(title)) % 10000}"
-    st.session_state.knowledge_db["documents"][doc_id] = {
-        "id": doc_id,
-        "title": title,
-        "content": content,
-        "category": category,
-        "tags": tags,
-        "created_at": datetime.now().isoformat()
-    }
+    if not service.add(title, content, category, tags):
+        return False
     
     # 즉시 백업 옵션 (중요한 변경사항)
     token = st.secrets.get("GITHUB_TOKEN")
-    if token and len(st.session_state.knowledge_db["documents"]) <= 5:  # 문서가 적으면 즉시 백업
+    if token and service.count() <= 5:  # 문서가 적으면 즉시 백업
         try:
-            backup_to_github()
-            st.session_state[AUTO_BACKUP_KEY] = datetime.now()
+            if "성공" in backup_to_github():
+                st.session_state[AUTO_BACKUP_KEY] = datetime.now()
         except:
             pass
     
     return True
 
-def search_knowledge(query):
-    results = []
-    query_lower = query.lower()
-    
-    for doc in st.session_state.knowledge_db["documents"].values():
-        score = 0
-        if query_lower in doc["title"].lower():
-            score += 20
-        if query_lower in doc["content"].lower():
-            score += 10
-        if query_lower in doc["category"].lower():
-            score += 15
-        if query_lower in doc["tags"].lower():
-            score += 15
-        
-        if score > 0:
-            doc_copy = doc.copy()
-            doc_copy["score"] = score
-            results.append(doc_copy)
-    
-    return sorted(results, key=lambda x: x["score"], reverse=True)[:5]
-
-def get_all_knowledge():
-    docs = list(st.session_state.knowledge_db["documents"].values())
-    return sorted(docs, key=lambda x: x["created_at"], reverse=True)
+def search_knowledge(query, prefix=False):
+    return service.search(query, n_results=5, prefix=prefix)
 
 def update_knowledge(doc_id, title, content, category, tags):
-    if doc_id in st.session_state.knowledge_db["documents"]:
-        old_created = st.session_state.knowledge_db["documents"][doc_id]["created_at"]
-        st.session_state.knowledge_db["documents"][doc_id] = {
-            "id": doc_id,
-            "title": title,
-            "content": content,
-            "category": category,
-            "tags": tags,
-            "created_at": old_created,
-            "updated_at": datetime.now().isoformat()
-        }
-        return True
-    return False
+    answer_cache.invalidate_doc(doc_id)
+    return service.update(doc_id, title, content, category, tags)
 
 def delete_knowledge(doc_id):
-    if doc_id in st.session_state.knowledge_db["documents"]:
-        del st.session_state.knowledge_db["documents"][doc_id]
-        return True
-    return False
+    answer_cache.invalidate_doc(doc_id)
+    return service.delete(doc_id)
 
 # 간단한 GitHub 백업
 def backup_to_github():
     try:
-        token = st.secrets.get("GITHUB_TOKEN")
-        if not token:
+        if service.github is None:
             return "❌ GitHub 토큰이 설정되지 않았습니다"
         
-        backup_data = {
-            "backup_time": datetime.now().isoformat(),
-            "total_documents": len(st.session_state.knowledge_db["documents"]),
-            "knowledge_db": st.session_state.knowledge_db
-        }
-        
-        content = json.dumps(backup_data, ensure_ascii=False, indent=2)
-        content_b64 = base64.b64encode(content.encode('utf-8')).decode('utf-8')
-        
-        url = f"https://api.github.com/repos/radpushman/Knowledge_for_CT_Room_Staff/contents/ct_knowledge_backup.json"
-        headers = {"Authorization": f"Bearer {token}"}
-        
-        # 기존 파일 확인
-        response = requests.get(url, headers=headers, timeout=10)
-        data = {
-            "message": f"Backup - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-            "content": content_b64
-        }
-        
-        if response.status_code == 200:
-            data["sha"] = response.json()["sha"]
-        
-        backup_response = requests.put(url, headers=headers, json=data, timeout=10)
-        
-        if backup_response.status_code in [200, 201]:
-            return f"✅ 백업 성공! ({len(st.session_state.knowledge_db['documents'])}개 문서)"
+        if service.backup():
+            if service.last_backup_skipped:
+                return f"✅ 백업 성공! (마지막 백업 이후 변경 없음, {service.count()}개 문서)"
+            return f"✅ 백업 성공! ({service.count()}개 문서)"
         else:
-            return f"❌ 백업 실패: {backup_response.status_code}"
+            return f"❌ 백업 실패: {service.last_error()}"
     except Exception as e:
         return f"❌ 백업 오류: {str(e)}"
 
@@ -291,79 +217,59 @@ def restore_from_github(security_code):
         return "❌ 잘못된 보안 코드입니다"
     
     try:
-        token = st.secrets.get("GITHUB_TOKEN")
-        if not token:
+        if service.github is None:
             return "❌ GitHub 토큰이 설정되지 않았습니다"
         
-        url = f"https://api.github.com/repos/radpushman/Knowledge_for_CT_Room_Staff/contents/ct_knowledge_backup.json"
-        headers = {"Authorization": f"Bearer {token}"}
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            return f"❌ 백업 파일 없음: {response.status_code}"
-        
-        file_info = response.json()
-        content_response = requests.get(file_info["download_url"], timeout=10)
-        
-        if content_response.status_code == 200:
-            backup_data = json.loads(content_response.text)
-            if "knowledge_db" in backup_data:
-                st.session_state.knowledge_db = backup_data["knowledge_db"]
-                doc_count = len(backup_data["knowledge_db"]["documents"])
-                return f"✅ 복원 성공! {doc_count}개 문서"
-            else:
-                return "❌ 잘못된 백업 데이터"
+        if service.restore():
+            return f"✅ 복원 성공! {service.count()}개 문서"
         else:
-            return f"❌ 다운로드 실패: {content_response.status_code}"
+            return f"❌ 복원 실패: {service.last_error()}"
     except Exception as e:
         return f"❌ 복원 오류: {str(e)}"
 
+def show_ai_answer_notice():
+    with st.expander("ℹ️ AI 답변에 대한 주의사항"):
+        st.warning("""
+        **중요:** 
+        - AI 답변은 등록된 지식 자료를 바탕으로 생성됩니다
+        - 의료적 판단이 필요한 경우 반드시 의료진과 상담하세요
+        - 응급상황에서는 기존 프로토콜을 우선 적용하세요
+        """)
+
 # 백업 시간 확인 함수 추가
 def get_backup_info():
     """GitHub 백업 파일의 최종 백업 시간 확인"""
     try:
-        token = st.secrets.get("GITHUB_TOKEN")
-        if not token:
-            return None
-        
-        url = f"https://api.github.com/repos/radpushman/Knowledge_for_CT_Room_Staff/contents/ct_knowledge_backup.json"
-        headers = {"Authorization": f"Bearer {token}"}
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code == 200:
-            file_info = response.json()
-            # GitHub API에서 파일 수정 시간 가져오기
-            content_response = requests.get(file_info["download_url"], timeout=10)
-            if content_response.status_code == 200:
-                backup_data = json.loads(content_response.text)
-                backup_time = backup_data.get("backup_time")
-                total_docs = backup_data.get("total_documents", 0)
+        info = service.backup_info()
+        if info:
+            backup_time = info.get("backup_time")
+            total_docs = info.get("total_documents", 0)
+            
+            if backup_time:
+                # ISO 시간을 서울 시간으로 변환
+                from datetime import datetime, timezone, timedelta
                 
-                if backup_time:
-                    # ISO 시간을 서울 시간으로 변환
-                    from datetime import datetime, timezone, timedelta
-                    
-                    # UTC 시간을 datetime 객체로 변환
-                    backup_dt = datetime.fromisoformat(backup_time.replace('Z', '+00:00'))
-                    
-                    # 서울 시간대 (UTC+9) 적용
-                    seoul_tz = timezone(timedelta(hours=9))
-                    seoul_time = backup_dt.astimezone(seoul_tz)
-                    
-                    # 서울 시간으로 포맷팅
-                    formatted_time = seoul_time.strftime('%m월 %d일 %H:%M')
-                    
-                    return {
-                        "backup_time": formatted_time,
-                        "total_docs": total_docs,
-                        "raw_time": backup_time
-                    }
+                # UTC 시간을 datetime 객체로 변환
+                backup_dt = datetime.fromisoformat(backup_time.replace('Z', '+00:00'))
+                
+                # 서울 시간대 (UTC+9) 적용
+                seoul_tz = timezone(timedelta(hours=9))
+                seoul_time = backup_dt.astimezone(seoul_tz)
+                
+                # 서울 시간으로 포맷팅
+                formatted_time = seoul_time.strftime('%m월 %d일 %H:%M')
+                
+                return {
+                    "backup_time": formatted_time,
+                    "total_docs": total_docs,
+                    "raw_time": backup_time
+                }
         return None
     except Exception as e:
         return None
 
 # 사이드바
-total_docs = len(st.session_state.knowledge_db["documents"])
+total_docs = service.count()
 st.sidebar.info(f"📚 총 지식: {total_docs}개")
 
 # 메인 기능 선택을 맨 위로 이동
@@ -444,9 +350,8 @@ else:
 # 사이드바에 AI 사용량 표시 (하단으로 이동)
 st.sidebar.markdown("---")
 if use_gemini:
-    usage = load_usage()
-    st.sidebar.info(f"🤖 오늘 AI 사용량: {usage['count']}/1,500")
-    if usage['count'] >= 1500:
+    st.sidebar.info(f"🤖 오늘 AI 사용량: {usage_tracker.count}/{usage_tracker.daily_limit:,}")
+    if usage_tracker.daily_exhausted():
         st.sidebar.warning("일일 무료 한도 초과!")
 else:
     # Gemini API 상태 디버깅 정보 추가
@@ -478,6 +383,7 @@ if mode == "💬 질문하기":
         st.warning("🤖 현재 키워드 검색만 가능 (AI 답변 비활성화)")
     
     question = st.text_input("궁금한 것을 입력하세요:", placeholder="예: 조영제 부작용 대응 방법")
+    stream_answer = st.toggle("⚡ 답변을 생성되는 대로 표시", value=True, disabled=not use_gemini)
     
     if question:
         # 1단계: 관련 지식 검색
@@ -487,14 +393,23 @@ if mode == "💬 질문하기":
         if results:
             st.success(f"🎯 {len(results)}개의 관련 자료를 찾았습니다!")
             
-            # 2단계: Gemini AI 답변 생성 (활성화된 경우에만)
-            if use_gemini and load_usage()["count"] < 1500:
+            # 2단계: Gemini AI 답변 생성 (활성화된 경우에만, 같은 질문·같은 자료면 저장된 답변 사용)
+            cached_answer = answer_cache.get(question, results, model_name) if use_gemini and not use_fake_model else None
+            if cached_answer is not None:
+                st.markdown("### 🤖 AI 종합 답변")
+                st.success("⚡ 같은 자료로 답변한 적이 있는 질문입니다. (AI 사용량 차감 없음)")
+                st.markdown(cached_answer)
+                show_ai_answer_notice()
+            
+            # 호출 전에 사용량을 예약하므로 동시에 질문해도 한도를 넘지 않음
+            elif use_gemini and (use_fake_model or usage_tracker.acquire()):
                 st.info("🤖 AI가 답변을 생성합니다...")
+                answered = False  # 답변을 받지 못하고 실패하면 예약한 사용량을 돌려줌
                 try:
-                    model = genai.GenerativeModel('gemini-2.0-flash-exp')
-                        
-                    # 검색된 지식을 컨텍스트로 제공
-                    context = "\n\n".join([f"**{doc['title']}**\n{doc['content']}" for doc in results])
+                    model = create_model()
+                    
+                    # 검색된 지식 중 질문과 가까운 부분만 글자 예산 안에서 컨텍스트로 제공
+                    context, sent_passages = service.build_context(question, results, CONTEXT_CHAR_BUDGET)
                     
                     prompt = f"""
 당신은 CT실 동료입니다. 간결하되 도움이 되게 답변하세요.
@@ -516,27 +431,46 @@ if mode == "💬 질문하기":
 - "마코 환자번호" → 시스템 용도와 입력 방법을 간단히 1-2줄로 설명
 """
 
-                    response = model.generate_content(prompt)
-                    increment_usage()
-                    
-                    st.markdown("### 🤖 AI 종합 답변")
-                    st.success("✨ Gemini 2.0 Flash가 검색된 자료를 분석하여 답변을 재구성했습니다.")
-                    st.markdown(response.text)
+                    if stream_answer:
+                        response = model.generate_content(prompt, stream=True)
+                        
+                        st.markdown("### 🤖 AI 종합 답변")
+                        st.success("✨ Gemini 2.0 Flash가 검색된 자료를 분석하여 답변을 재구성했습니다.")
+                        answer = StreamedAnswer(response)
+                        st.write_stream(answer)
+                        answered = bool(answer.text)
+                        if answer.completed:
+                            if not use_fake_model:
+                                answer_cache.put(question, results, answer.text, model_name)
+                            show_ai_answer_notice()
+                        else:
+                            # 도중에 끊긴 답변은 캐시하지 않고 검색 결과로 안내
+                            st.error(f"AI 답변 생성이 중단되었습니다: {answer.error}")
+                            st.info("AI 답변이 완성되지 않았으니, 아래 검색된 자료를 확인하세요.")
+                    else:
+                        response = model.generate_content(prompt)
+                        answer_text = response.text
+                        answered = bool(answer_text)
+                        if not use_fake_model:
+                            answer_cache.put(question, results, answer_text, model_name)
                         
-                    with st.expander("ℹ️ AI 답변에 대한 주의사항"):
-                        st.warning("""
-                        **중요:** 
-                        - AI 답변은 등록된 지식 자료를 바탕으로 생성됩니다
-                        - 의료적 판단이 필요한 경우 반드시 의료진과 상담하세요
-                        - 응급상황에서는 기존 프로토콜을 우선 적용하세요
-                        """)
+                        st.markdown("### 🤖 AI 종합 답변")
+                        st.success("✨ Gemini 2.0 Flash가 검색된 자료를 분석하여 답변을 재구성했습니다.")
+                        st.markdown(answer_text)
+                        show_ai_answer_notice()
                     
-                    current_usage = load_usage()["count"]
-                    st.info(f"💡 오늘 AI 사용량: {current_usage}/1,500 (무료)")
+                    with st.expander(f"📎 AI에 전달된 자료 ({len(sent_passages)}개 부분, {len(context)}자)"):
+                        for passage in sent_passages:
+                            st.caption(f"{passage['title']} - {passage['position'] + 1}번째 부분 ({passage['chars']}자)")
+                    
+                    st.info(f"💡 오늘 AI 사용량: {usage_tracker.count}/{usage_tracker.daily_limit:,} (무료)")
                     
                 except Exception as e:
                     st.error(f"AI 답변 생성 실패: {e}")
                     st.info("AI 답변 생성에 실패했지만, 아래 검색된 자료를 확인하세요.")
+                finally:
+                    if not answered and not use_fake_model:
+                        usage_tracker.release()
             
             elif not use_gemini:
                 st.info("🤖 AI 답변 기능을 활성화하려면 아래를 확인하세요:")
@@ -559,9 +493,12 @@ if mode == "💬 질문하기":
                     4. **기능**: 검색된 자료를 AI가 종합하여 맞춤 답변 생성
                     """)
             
-            elif load_usage()["count"] >= 1500:
+            elif usage_tracker.daily_exhausted():
                 st.warning("🚫 오늘의 AI 사용량을 모두 소진했습니다. 내일 다시 이용해주세요.")
             
+            else:
+                st.warning(f"⏳ 1분에 {usage_tracker.per_minute_limit}회까지 AI 답변을 생성할 수 있습니다. 잠시 후 다시 시도해주세요.")
+            
             # 3단계: 원본 검색 결과 표시
             st.markdown("### 📋 검색된 원본 자료")
             for i, doc in enumerate(results):
@@ -596,10 +533,10 @@ elif mode == "📝 지식 추가":
 
 elif mode == "📚 지식 검색":
     st.header("📚 지식 검색")
-    search_term = st.text_input("검색어:")
+    search_term = st.text_input("검색어:", placeholder="예: 조영 (입력한 단어로 시작하는 말도 찾습니다)")
     
     if search_term:
-        results = search_knowledge(search_term)
+        results = search_knowledge(search_term, prefix=True)
         if results:
             st.success(f"🔍 {len(results)}개 결과")
             for doc in results:
@@ -612,13 +549,18 @@ elif mode == "📚 지식 검색":
 
 elif mode == "✏️ 지식 편집":
     st.header("✏️ 지식 편집")
-    all_docs = get_all_knowledge()
+    # 한 페이지 분량의 요약만 가져오고, 본문은 선택한 문서만 불러옴
+    total = service.count()
     
-    if all_docs:
-        doc_titles = [f"{doc['title']} ({doc['category']})" for doc in all_docs]
-        selected_idx = st.selectbox("편집할 지식:", range(len(doc_titles)), format_func=lambda x: doc_titles[x])
-        selected_doc = all_docs[selected_idx]
-        
+    if total:
+        pages = (total + EDIT_PAGE_SIZE - 1) // EDIT_PAGE_SIZE
+        page = st.number_input(f"페이지 (총 {pages}쪽, {total}개)", min_value=1, max_value=pages, value=1) if pages > 1 else 1
+        summaries, _ = service.list_summaries((page - 1) * EDIT_PAGE_SIZE, EDIT_PAGE_SIZE)
+        selected_summary = st.selectbox("편집할 지식:", summaries,
+                                        format_func=lambda doc: f"{doc['title']} ({doc['category']})")
+        selected_doc = service.get_document(selected_summary['id']) if selected_summary else None
+    
+    if total and selected_doc:
         security_edit = st.text_input("편집 코드:", type="password", key="edit_security")
         
         if security_edit == SECURITY_CODE:
@@ -644,7 +586,7 @@ elif mode == "✏️ 지식 편집":
                         st.rerun()
         elif security_edit:
             st.error("❌ 잘못된 코드")
-    else:
+    elif not total:
         st.info("편집할 지식이 없습니다.")
 
 # 하단 정보
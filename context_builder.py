@@ -0,0 +1,160 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from tokenizer import Analyzer
+
+# 패시지 최대 길이(글자)와 AI 프롬프트에 넣을 자료의 기본 글자 예산
+PASSAGE_CHARS = 500
+DEFAULT_CONTEXT_CHARS = 3000
+# 색인어 집합의 Jaccard 유사도가 이 이상이면 같은 내용으로 보고 제외
+DUPLICATE_JACCARD = 0.8
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?。])\s+|\n")
+
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """max_chars보다 긴 단락을 문장(없으면 글자 수) 단위로 분리"""
+    pieces = []
+    for sentence in _SENTENCE_RE.split(text):
+        sentence = sentence.strip()
+        while len(sentence) > max_chars:
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if sentence:
+            pieces.append(sentence)
+    return pieces
+
+
+def split_passages(content: str, max_chars: int = PASSAGE_CHARS) -> List[str]:
+    """본문을 단락 경계 기준으로 max_chars 이하 패시지로 분할 (짧은 단락은 합침)"""
+    units = []
+    for paragraph in _PARAGRAPH_RE.split(content):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        units.extend([paragraph] if len(paragraph) <= max_chars else _split_long(paragraph, max_chars))
+
+    passages: List[str] = []
+    current = ""
+    for unit in units:
+        if current and len(current) + 2 + len(unit) > max_chars:
+            passages.append(current)
+            current = unit
+        else:
+            current = f"{current}\n\n{unit}" if current else unit
+    if current:
+        passages.append(current)
+    return passages
+
+
+class Passage:
+    __slots__ = ("doc_id", "position", "text", "terms")
+
+    def __init__(self, doc_id: str, position: int, text: str, terms: Counter):
+        self.doc_id = doc_id
+        self.position = position  # 문서 안에서의 순번
+        self.text = text
+        self.terms = terms
+
+
+class PassageIndex:
+    """문서별 패시지와 색인어를 쓰기 시점에 미리 계산해 두는 저장소
+
+    내용이 바뀐 문서(복원 등으로 통째로 교체된 경우 포함)는 조회 시 다시 분할합니다.
+    """
+
+    def __init__(self, analyzer: Analyzer, max_chars: int = PASSAGE_CHARS):
+        self.analyzer = analyzer
+        self.max_chars = max_chars
+        self._docs: Dict[str, Tuple[str, List[Passage]]] = {}  # doc_id → (본문, 패시지들)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def build(self, documents: Dict[str, Dict]):
+        self._docs = {}
+        for doc_id, data in documents.items():
+            self.put(doc_id, data["content"])
+
+    def put(self, doc_id: str, content: str) -> List[Passage]:
+        passages = [
+            Passage(doc_id, position, text, Counter(self.analyzer.analyze(text)))
+            for position, text in enumerate(split_passages(content, self.max_chars))
+        ]
+        self._docs[doc_id] = (content, passages)
+        return passages
+
+    def remove(self, doc_id: str):
+        self._docs.pop(doc_id, None)
+
+    def get(self, doc_id: str, content: str) -> List[Passage]:
+        entry = self._docs.get(doc_id)
+        if entry is None or entry[0] != content:
+            return self.put(doc_id, content)
+        return entry[1]
+
+
+def _jaccard(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 1.0 if a == b else 0.0
+    return len(a.keys() & b.keys()) / len(a.keys() | b.keys())
+
+
+def build_context(question: str, results: List[Dict], passages: PassageIndex,
+                  max_chars: int = DEFAULT_CONTEXT_CHARS) -> Tuple[str, List[Dict]]:
+    """검색 결과에서 질문과 가까운 패시지를 글자 예산 안에서 골라 프롬프트 자료를 구성
+
+    반환값은 (자료 텍스트, 보낸 패시지 목록 [{"id", "title", "position", "chars"}]) 입니다.
+    패시지 점수는 질문 색인어 일치도 × 문서 검색 점수 비율이며,
+    이미 고른 패시지에 포함되거나 거의 같은 내용(DUPLICATE_JACCARD 이상)은 제외합니다.
+    """
+    if not results:
+        return "", []
+    query_terms = set(passages.analyzer.analyze(question))
+    top_score = max(doc.get("score", 0) for doc in results) or 1.0
+
+    candidates: List[Tuple[float, int, Passage]] = []
+    titles = {}
+    for rank, doc in enumerate(results):
+        titles[doc["id"]] = doc["title"]
+        doc_weight = max(doc.get("score", 0), 0) / top_score or 1.0 / (rank + 1)
+        for passage in passages.get(doc["id"], doc["content"]):
+            match = sum(1.0 + math.log(passage.terms[term]) for term in query_terms if term in passage.terms)
+            # 일치하는 색인어가 없어도 예산이 남으면 들어가도록 작은 기본 점수
+            candidates.append((doc_weight * (match + 0.1), rank, passage))
+    candidates.sort(key=lambda item: (-item[0], item[1], item[2].position))
+
+    selected: List[Tuple[int, Passage]] = []
+    for _, rank, passage in candidates:
+        # 예산보다 긴 패시지는 조립해 볼 필요 없이 제외
+        if len(passage.text) > max_chars:
+            continue
+        if any(passage.text in p.text or p.text in passage.text
+               or _jaccard(p.terms, passage.terms) >= DUPLICATE_JACCARD for _, p in selected):
+            continue
+        # 제목 머리말, 블록/패시지 사이 구분자(인접하지 않으면 "…")까지 포함한 실제 길이로 확인
+        if len(_assemble(selected + [(rank, passage)], titles)[0]) > max_chars:
+            continue
+        selected.append((rank, passage))
+    return _assemble(selected, titles)
+
+
+def _assemble(selected: List[Tuple[int, Passage]], titles: Dict[str, str]) -> Tuple[str, List[Dict]]:
+    """고른 패시지를 문서 검색 순위 → 문서 안 순서대로 배치해 자료 텍스트 구성"""
+    ordered = sorted(selected, key=lambda item: (item[0], item[1].position))
+    blocks: List[str] = []
+    sent: List[Dict] = []
+    previous: Optional[Passage] = None
+    for _, passage in ordered:
+        if previous is None or previous.doc_id != passage.doc_id:
+            blocks.append(f"**{titles[passage.doc_id]}**\n{passage.text}")
+        else:
+            gap = "\n\n" if passage.position == previous.position + 1 else "\n\n…\n\n"
+            blocks[-1] += gap + passage.text
+        sent.append({"id": passage.doc_id, "title": titles[passage.doc_id],
+                     "position": passage.position, "chars": len(passage.text)})
+        previous = passage
+    return "\n\n".join(blocks), sent
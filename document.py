@@ -0,0 +1,91 @@
+import sys
+from typing import Dict, Optional
+
+from tokenizer import normalize_text
+
+
+def _normalized(text: str) -> str:
+    """normalize_text 결과 (원문과 같으면 원문 객체를 공유해 메모리를 아낌)"""
+    normalized = normalize_text(text)
+    return text if normalized == text else normalized
+
+
+class Document:
+    """메모리 상의 문서 레코드 (__slots__, 저장소 dict의 문자열을 복사하지 않고 공유)
+
+    카테고리는 intern되어 같은 카테고리 문서들이 문자열 하나를 함께 씁니다. normalized에는
+    검색 필드(title/category/tags/content)의 normalize_text 결과가 쓰기 시점에 한 번
+    계산되어 있어 색인 시 다시 정규화하지 않습니다.
+    기존 코드와 같이 doc['title'], doc.get('tags') 형태로도 읽을 수 있습니다.
+    수정 시에는 새 레코드로 교체하며 제자리 변경하지 않습니다(정규화 캐시도 함께 교체).
+    """
+
+    __slots__ = ("id", "title", "content", "category", "tags", "created_at", "updated_at", "normalized")
+
+    def __init__(self, doc_id: str, title: str, content: str, category: str, tags: str = "",
+                 created_at: str = "", updated_at: Optional[str] = None):
+        self.id = doc_id
+        self.title = title
+        self.content = content
+        self.category = sys.intern(category)
+        self.tags = tags
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.normalized = {
+            "title": _normalized(title),
+            "category": sys.intern(normalize_text(category)),
+            "tags": _normalized(tags),
+            "content": _normalized(content),
+        }
+
+    @classmethod
+    def from_data(cls, doc_id: str, data: Dict) -> "Document":
+        """JSON DB 문서({"content", "metadata"})에서 생성"""
+        metadata = data["metadata"]
+        return cls(doc_id, metadata["title"], data["content"], metadata["category"],
+                   metadata.get("tags", ""), metadata.get("created_at", ""), metadata.get("updated_at"))
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def to_dict(self) -> Dict:
+        return {key: getattr(self, key) for key in self.__slots__ if key != "normalized"}
+
+    def __repr__(self) -> str:
+        return f"Document({self.id!r}, {self.title!r})"
+
+
+class SearchHit:
+    """검색 결과 한 건 (문서 레코드 참조 + 점수, 결과마다 dict를 새로 만들지 않음)"""
+
+    __slots__ = ("document", "score")
+
+    def __init__(self, document: Document, score: float):
+        self.document = document
+        self.score = score
+
+    @property
+    def id(self) -> str:
+        return self.document.id
+
+    def __getitem__(self, key: str):
+        if key == "score":
+            return self.score
+        return self.document[key]
+
+    def get(self, key: str, default=None):
+        if key == "score":
+            return self.score
+        return self.document.get(key, default)
+
+    def to_dict(self) -> Dict:
+        return {**self.document.to_dict(), "score": self.score}
+
+    def __repr__(self) -> str:
+        return f"SearchHit({self.document.id!r}, {self.score})"
@@ -0,0 +1,69 @@
+import time
+from typing import Iterator, List, Optional
+
+
+class StreamedAnswer:
+    """generate_content(..., stream=True) 응답을 글자 조각 단위로 내보내는 이터레이터
+
+    st.write_stream에 그대로 넘길 수 있습니다. 스트림 도중 오류가 나면 예외를
+    밖으로 던지지 않고 멈춘 뒤 error에 남기므로, 호출 측에서 받은 부분까지만
+    보여주고 검색 결과로 대체할 수 있습니다. 받은 전체 텍스트는 text에 모입니다.
+    """
+
+    def __init__(self, response):
+        self.response = response
+        self.chunks: List[str] = []
+        self.error: Optional[Exception] = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+    @property
+    def completed(self) -> bool:
+        return self.error is None
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            for chunk in self.response:
+                text = chunk.text
+                if text:
+                    self.chunks.append(text)
+                    yield text
+        except Exception as e:
+            self.error = e
+
+
+class FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """오프라인 확인용 Gemini 모델 대역 (genai.GenerativeModel과 같은 generate_content 사용법)
+
+    answer를 chunk_size 글자씩 delay초 간격으로 내보내며, fail_after를 주면
+    그만큼 조각을 보낸 뒤 오류를 발생시켜 스트림 중단을 흉내 냅니다.
+    """
+
+    def __init__(self, answer: str = "가짜 모델 답변입니다. 검색된 자료를 확인하세요.",
+                 chunk_size: int = 8, delay: float = 0.02, fail_after: Optional[int] = None):
+        self.answer = answer
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.fail_after = fail_after
+        self.prompts: List[str] = []
+
+    def _chunks(self) -> Iterator[FakeChunk]:
+        for i, start in enumerate(range(0, len(self.answer), self.chunk_size)):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise ConnectionError("fake stream interrupted")
+            if self.delay:
+                time.sleep(self.delay)
+            yield FakeChunk(self.answer[start:start + self.chunk_size])
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        self.prompts.append(prompt)
+        if stream:
+            return self._chunks()
+        return FakeChunk("".join(chunk.text for chunk in self._chunks()))
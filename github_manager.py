@@ -1,21 +1,146 @@
 import requests
 import base64
+import hashlib
 import json
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 import re
 
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from oplog import atomic_write_json
+
 class GitHubManager:
-    def __init__(self, token: str, repo: str):
+    # 앱 전체 스냅샷 백업 파일 (저장소 루트)
+    SNAPSHOT_PATH = "ct_knowledge_backup.json"
+    # 스냅샷 이후 변경된 문서만 담는 델타 파일
+    DELTA_PATH = "ct_knowledge_delta.json"
+    # 델타 문서 수가 이 비율(또는 최소 개수)을 넘으면 전체 스냅샷을 다시 올림
+    DELTA_MAX_RATIO = 0.25
+    DELTA_MIN_DOCS = 20
+    # 이보다 큰 파일은 트리에 직접 넣지 않고 blob을 따로 생성
+    INLINE_BLOB_MAX_BYTES = 512 * 1024
+    # HTTP 기본 타임아웃(초, 연결/읽기)과 재시도 설정
+    REQUEST_TIMEOUT = (5, 30)
+    MAX_RETRIES = 3
+    RETRY_BACKOFF = 0.5
+    # 403/429 rate limit 응답에서 이 시간(초) 이하로 기다리면 되는 경우만 재시도
+    RATE_LIMIT_MAX_WAIT = 60
+    RATE_LIMIT_RETRIES = 2
+    # ETag 캐시에 보관할 최대 응답 수
+    ETAG_CACHE_SIZE = 256
+    # sync_from_github 동시 다운로드 수와 스트리밍 단위
+    DOWNLOAD_WORKERS = 8
+    DOWNLOAD_CHUNK_SIZE = 64 * 1024
+    # 로컬 knowledge/ 파일과 원격 blob sha의 마지막 동기화 상태
+    SYNC_MANIFEST_PATH = "./knowledge_sync_manifest.json"
+    
+    def __init__(self, token: str, repo: str, branch: Optional[str] = None):
         self.token = token
         self.repo = repo
+        self.branch = branch  # None이면 저장소 기본 브랜치 사용
         self.base_url = "https://api.github.com"
         self.headers = {
             "Authorization": f"token {token}",
             "Accept": "application/vnd.github.v3+json"
         }
         self.last_error: Optional[str] = None  # 마지막 오류 메시지 저장
+        
+        # 증분 백업 상태
+        self._remote_shas: Dict[str, str] = {}  # 경로 → 마지막으로 알고 있는 원격 blob sha
+        self._base: Optional[Dict] = None  # 원격 스냅샷 {"backup_time", "hashes": {doc_id: 해시}}
+        self.snapshot_missing = False  # 마지막 fetch_snapshot에서 원격 스냅샷이 없었는지 (404)
+        self._last_backup_hash: Optional[str] = None  # 마지막으로 올린 전체 상태 해시
+        self.last_backup_skipped = False
+        self.last_sync_failures: Dict[str, str] = {}  # 마지막 동기화에서 실패한 파일 → 오류
+        self.last_sync_conflicts: List[str] = []  # 마지막 동기화/백업에서 양쪽 모두 바뀌어 건너뛴 경로
+        self._manifest: Optional[Dict[str, Dict]] = None  # 원격 경로 → {"sha", "local_sha", "size", "mtime_ns"}
+        
+        self.session = self._create_session()
+        self._etag_cache: "OrderedDict[str, requests.Response]" = OrderedDict()  # URL → ETag가 있는 마지막 200 응답
+        self._etag_lock = threading.Lock()
+
+    def _create_session(self) -> requests.Session:
+        """연결을 재사용하는 세션 (5xx는 지수 백오프로 재시도)"""
+        retry = Retry(
+            total=self.MAX_RETRIES,
+            backoff_factor=self.RETRY_BACKOFF,
+            status_forcelist=(500, 502, 503, 504),
+            # Git Data API의 blob/tree는 내용 기반이라 POST를 다시 보내도 결과가 같음
+            allowed_methods=frozenset({"GET", "PUT", "DELETE", "POST", "PATCH"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _rate_limit_wait(self, response: requests.Response) -> Optional[float]:
+        """rate limit 응답이면 기다릴 시간(초), 아니거나 너무 길면 None"""
+        if response.status_code not in (403, 429):
+            return None
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                wait = float(retry_after)
+            except ValueError:
+                return None
+        elif response.headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                wait = float(response.headers.get("X-RateLimit-Reset", "")) - time.time()
+            except ValueError:
+                return None
+        else:
+            return None
+        return max(wait, 0.0) if wait <= self.RATE_LIMIT_MAX_WAIT else None
+
+    def _request(self, method: str, url: str, auth: bool = True, **kwargs) -> requests.Response:
+        """공용 세션으로 요청 (기본 타임아웃, rate limit 대기 후 재시도, GET은 ETag 조건부 요청)
+
+        GET 응답에 ETag가 있으면 보관해 두었다가 다음 요청에 If-None-Match로 보내고,
+        304(변경 없음)가 오면 보관한 응답을 그대로 돌려줍니다. 304는 rate limit에 계산되지 않습니다.
+        """
+        kwargs.setdefault("timeout", self.REQUEST_TIMEOUT)
+        headers = dict(self.headers) if auth else {}
+        headers.update(kwargs.pop("headers", None) or {})
+        
+        # 스트리밍 응답은 본문을 한 번만 읽을 수 있으므로 ETag 캐시에 넣지 않음
+        conditional = method == "GET" and not kwargs.get("stream")
+        cached = None
+        if conditional:
+            with self._etag_lock:
+                cached = self._etag_cache.get(url)
+            if cached is not None:
+                headers["If-None-Match"] = cached.headers["ETag"]
+        
+        for attempt in range(self.RATE_LIMIT_RETRIES + 1):
+            response = self.session.request(method, url, headers=headers, **kwargs)
+            wait = self._rate_limit_wait(response)
+            if wait is None or attempt == self.RATE_LIMIT_RETRIES:
+                break
+            print(f"GitHub rate limit reached, retrying in {wait:.0f}s")
+            time.sleep(wait)
+        
+        if conditional:
+            if response.status_code == 304 and cached is not None:
+                return cached
+            if response.status_code == 200 and response.headers.get("ETag"):
+                with self._etag_lock:
+                    self._etag_cache[url] = response
+                    self._etag_cache.move_to_end(url)
+                    while len(self._etag_cache) > self.ETAG_CACHE_SIZE:
+                        self._etag_cache.popitem(last=False)
+        return response
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        return self._request("GET", url, **kwargs)
 
     def _set_error(self, where: str, response: Optional[requests.Response] = None, exc: Optional[Exception] = None):
         if response is not None:
@@ -68,86 +193,323 @@ class GitHubManager:
             return False
     
     def backup_all_knowledge(self, km) -> bool:
-        """모든 지식을 GitHub에 백업"""
+        """모든 지식을 GitHub에 백업 (로컬에서만 바뀐 파일을 한 번의 커밋으로)
+
+        manifest에 기록된 마지막 동기화 sha와 비교해 원격에서만 바뀐 파일은 되돌리지 않고
+        건너뛰며, 양쪽 모두 바뀐 파일은 last_sync_conflicts에 남기고 실패로 보고합니다.
+        """
+        self.last_sync_conflicts = []
         try:
-            self._ensure_knowledge_folder()
-            knowledge_dir = "./knowledge"
-            if not os.path.exists(knowledge_dir):
-                return True
-            
-            success_count = 0
-            total_files = 0
-            
-            for filename in os.listdir(knowledge_dir):
-                # README.md 제외
-                if filename.endswith('.md') and filename.lower() != "readme.md":
-                    total_files += 1
-                    filepath = os.path.join(knowledge_dir, filename)
-                    
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    github_path = f"knowledge/{filename}"
-                    if self._upload_file(github_path, content, f"Backup: {filename}"):
-                        success_count += 1
-            
-            if total_files == 0:
+            local_files = self._local_knowledge_files()
+            if not local_files:
                 self.last_error = "No markdown files to backup in ./knowledge"
                 return False
             
-            ok = success_count == total_files
-            if not ok:
-                self.last_error = f"Backed up {success_count}/{total_files} files"
-            return ok
+            # 목록 요청 한 번으로 원격 sha와 비교 (폴더가 없으면 전부 업로드)
+            remote = self._list_remote_knowledge(missing_ok=True)
+            if remote is None:
+                return False
+            remote_shas = {file_info['path']: file_info['sha'] for file_info in remote}
+            
+            changed = {}
+            for path, filepath in local_files.items():
+                direction = self._sync_direction(path, self._local_blob_sha(path, filepath), remote_shas.get(path))
+                if direction == "same":
+                    self._manifest[path]["sha"] = remote_shas[path]
+                elif direction == "local":
+                    changed[path] = filepath
+                elif direction == "conflict":
+                    self.last_sync_conflicts.append(path)
+            
+            if changed:
+                files = {}
+                for path, filepath in changed.items():
+                    # 줄바꿈을 바꾸지 않고 읽어야 올린 blob sha가 로컬 파일의 sha와 같음
+                    with open(filepath, 'r', encoding='utf-8', newline='') as f:
+                        files[path] = f.read()
+                
+                if not self.commit_files(files, f"Backup: {len(files)} knowledge files"):
+                    self._save_manifest()
+                    return False
+                for path in changed:
+                    self._manifest[path]["sha"] = self._manifest[path]["local_sha"]
+            else:
+                print("No locally changed knowledge files to upload")
+            self._save_manifest()
+            
+            if self.last_sync_conflicts:
+                self.last_error = (f"backup_all_knowledge: {len(self.last_sync_conflicts)} files changed both locally "
+                                   f"and on GitHub, not uploaded: {', '.join(self.last_sync_conflicts)}")
+                return False
+            return True
             
         except Exception as e:
             self._set_error("backup_all_knowledge", exc=e)
             return False
     
-    def sync_from_github(self) -> bool:
-        """GitHub에서 최신 지식을 동기화"""
+    @staticmethod
+    def git_blob_sha(content: bytes) -> str:
+        """git이 계산하는 blob sha (원격 트리의 sha와 비교용)"""
+        header = f"blob {len(content)}\0".encode('utf-8')
+        return hashlib.sha1(header + content).hexdigest()
+    
+    def _default_branch(self) -> Optional[str]:
+        if self.branch is None:
+            response = self._get(f"{self.base_url}/repos/{self.repo}")
+            if response.status_code != 200:
+                self._set_error("default_branch", response)
+                return None
+            self.branch = response.json().get("default_branch", "main")
+        return self.branch
+    
+    def commit_files(self, files: Dict[str, str], commit_message: str) -> bool:
+        """여러 파일을 Git Data API(blob/tree/commit/ref)로 한 커밋에 올림
+
+        원격 트리와 git blob sha가 같은 파일은 제외하며, 바뀐 파일이 없으면 커밋하지 않습니다.
+        """
         try:
-            # GitHub의 knowledge 폴더 내용 가져오기
-            url = f"{self.base_url}/repos/{self.repo}/contents/knowledge"
-            response = requests.get(url, headers=self.headers)
+            branch = self._default_branch()
+            if branch is None:
+                return False
+            repo_url = f"{self.base_url}/repos/{self.repo}"
             
-            print(f"GitHub API response status: {response.status_code}")
+            # 1. 브랜치 HEAD 커밋과 트리
+            ref_response = self._get(f"{repo_url}/git/ref/heads/{branch}")
+            if ref_response.status_code != 200:
+                self._set_error("commit_files(ref)", ref_response)
+                return False
+            head_sha = ref_response.json()["object"]["sha"]
             
-            if response.status_code == 404:
-                self._set_error("sync_from_github", response)
+            commit_response = self._get(f"{repo_url}/git/commits/{head_sha}")
+            if commit_response.status_code != 200:
+                self._set_error("commit_files(commit)", commit_response)
+                return False
+            base_tree_sha = commit_response.json()["tree"]["sha"]
+            
+            tree_response = self._get(f"{repo_url}/git/trees/{base_tree_sha}?recursive=1")
+            if tree_response.status_code != 200:
+                self._set_error("commit_files(tree)", tree_response)
                 return False
-            elif response.status_code != 200:
-                self._set_error("sync_from_github", response)
+            remote_shas = {item["path"]: item["sha"] for item in tree_response.json().get("tree", [])
+                           if item.get("type") == "blob"}
+            
+            # 2. 바뀐 파일만 트리 항목으로 (큰 파일은 blob을 따로 생성)
+            entries = []
+            for path, content in files.items():
+                content_bytes = content.encode('utf-8')
+                if remote_shas.get(path) == self.git_blob_sha(content_bytes):
+                    continue
+                entry = {"path": path, "mode": "100644", "type": "blob"}
+                if len(content_bytes) > self.INLINE_BLOB_MAX_BYTES:
+                    blob_response = self._request("POST", f"{repo_url}/git/blobs", json={
+                        "content": base64.b64encode(content_bytes).decode('utf-8'),
+                        "encoding": "base64"
+                    })
+                    if blob_response.status_code != 201:
+                        self._set_error("commit_files(blob)", blob_response)
+                        return False
+                    entry["sha"] = blob_response.json()["sha"]
+                else:
+                    entry["content"] = content
+                entries.append(entry)
+            
+            if not entries:
+                print("No changed files to commit")
+                return True
+            
+            # 3. 새 트리 → 커밋 → 브랜치 이동
+            new_tree = self._request("POST", f"{repo_url}/git/trees",
+                                     json={"base_tree": base_tree_sha, "tree": entries})
+            if new_tree.status_code != 201:
+                self._set_error("commit_files(create tree)", new_tree)
+                return False
+            
+            new_commit = self._request("POST", f"{repo_url}/git/commits", json={
+                "message": commit_message,
+                "tree": new_tree.json()["sha"],
+                "parents": [head_sha]
+            })
+            if new_commit.status_code != 201:
+                self._set_error("commit_files(create commit)", new_commit)
+                return False
+            
+            update_ref = self._request("PATCH", f"{repo_url}/git/refs/heads/{branch}",
+                                       json={"sha": new_commit.json()["sha"]})
+            if update_ref.status_code != 200:
+                self._set_error("commit_files(update ref)", update_ref)
+                return False
+            
+            print(f"Committed {len(entries)} files in one commit")
+            return True
+            
+        except Exception as e:
+            self._set_error("commit_files", exc=e)
+            return False
+    
+    def _download_file(self, download_url: str, local_path: str):
+        """파일을 스트리밍으로 임시 파일에 받은 뒤 교체 (실패하면 예외)"""
+        tmp_path = f"{local_path}.part"
+        with self._get(download_url, auth=False, stream=True) as response:
+            if response.status_code != 200:
+                raise IOError(f"{response.status_code} {response.reason}")
+            try:
+                with open(tmp_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                os.replace(tmp_path, local_path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+    
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if self._manifest is None:
+            self._manifest = {}
+            if os.path.exists(self.SYNC_MANIFEST_PATH):
+                try:
+                    with open(self.SYNC_MANIFEST_PATH, 'r', encoding='utf-8') as f:
+                        self._manifest = json.load(f).get("files", {})
+                except (OSError, ValueError) as e:
+                    print(f"Ignoring unreadable sync manifest: {e}")
+        return self._manifest
+    
+    def _save_manifest(self):
+        atomic_write_json(self.SYNC_MANIFEST_PATH, {
+            "updated_at": datetime.now().isoformat(),
+            "files": self._load_manifest()
+        })
+    
+    def _local_blob_sha(self, path: str, filepath: str) -> Optional[str]:
+        """로컬 파일의 git blob sha (크기/수정 시각이 manifest와 같으면 다시 읽지 않음)"""
+        try:
+            stat = os.stat(filepath)
+        except FileNotFoundError:
+            return None
+        manifest = self._load_manifest()
+        entry = manifest.get(path)
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            return entry["local_sha"]
+        with open(filepath, 'rb') as f:
+            local_sha = self.git_blob_sha(f.read())
+        manifest[path] = {"sha": (entry or {}).get("sha"), "local_sha": local_sha,
+                          "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        return local_sha
+    
+    def _sync_direction(self, path: str, local_sha: Optional[str], remote_sha: Optional[str]) -> str:
+        """manifest의 기준 sha(마지막으로 맞춘 원격 sha)로 어느 쪽이 바뀌었는지 판단
+
+        "same"(같음), "local"(로컬만 바뀜), "remote"(원격만 바뀜), "conflict"(양쪽 모두 바뀜) 중 하나.
+        한쪽에만 있는 파일은 있는 쪽이 새것으로 봅니다. 기준 sha가 없으면(처음 실행, manifest 삭제)
+        로컬 변경 기록이 없는 것이므로 원격을 따릅니다.
+        """
+        if local_sha == remote_sha:
+            return "same"
+        if local_sha is None:
+            return "remote"
+        if remote_sha is None:
+            return "local"
+        base_sha = self._load_manifest().get(path, {}).get("sha")
+        if base_sha is None:
+            return "remote"
+        if base_sha == remote_sha:
+            return "local"
+        if base_sha == local_sha:
+            return "remote"
+        return "conflict"
+    
+    def _record_synced(self, path: str, filepath: str, sha: str):
+        """로컬 파일이 원격 blob sha와 같아졌음을 manifest에 기록"""
+        stat = os.stat(filepath)
+        self._load_manifest()[path] = {"sha": sha, "local_sha": sha,
+                                       "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    
+    def _local_knowledge_files(self, knowledge_dir: str = "./knowledge") -> Dict[str, str]:
+        """원격 경로(knowledge/파일명) → 로컬 경로 (README.md 제외)"""
+        if not os.path.exists(knowledge_dir):
+            return {}
+        return {f"knowledge/{filename}": os.path.join(knowledge_dir, filename)
+                for filename in sorted(os.listdir(knowledge_dir))
+                if filename.endswith('.md') and filename.lower() != "readme.md"}
+    
+    def _list_remote_knowledge(self, missing_ok: bool = False) -> Optional[List[Dict]]:
+        """원격 knowledge 폴더의 마크다운 파일 정보 (README.md 제외, 실패하면 None)"""
+        url = f"{self.base_url}/repos/{self.repo}/contents/knowledge"
+        response = self._get(url)
+        if response.status_code == 404 and missing_ok:
+            return []
+        if response.status_code != 200:
+            self._set_error("list_knowledge", response)
+            return None
+        return [file_info for file_info in response.json()
+                if file_info['name'].endswith('.md') and file_info['name'].lower() != 'readme.md']
+    
+    def sync_from_github(self, max_workers: Optional[int] = None,
+                         progress: Optional[Callable[[str, bool, int, int], None]] = None) -> bool:
+        """GitHub에서 최신 지식을 동기화 (원격에서만 바뀐 파일만 다운로드)
+
+        manifest에 기록된 마지막 동기화 sha와 비교해 로컬에서만 바뀐 파일은 덮어쓰지 않고,
+        양쪽 모두 바뀐 파일은 last_sync_conflicts에 남깁니다. 변경이 없으면 목록 요청 한 번으로 끝납니다. 파일은 최대 max_workers개씩
+        동시에 내려받으며, 파일마다 progress(파일명, 성공 여부, 완료 수, 전체 수)를
+        호출합니다. 실패한 파일은 last_sync_failures({파일명: 오류})에 모두 남습니다.
+        """
+        self.last_sync_failures = {}
+        self.last_sync_conflicts = []
+        try:
+            files = self._list_remote_knowledge()
+            if files is None:
+                return False
+            if not files:
+                self.last_error = "No knowledge files found in GitHub/knowledge (excluding README.md)"
                 return False
             
-            files = response.json()
             knowledge_dir = "./knowledge"
             os.makedirs(knowledge_dir, exist_ok=True)
             
-            downloaded_count = 0
-            
+            pending = []
             for file_info in files:
-                # README.md 파일은 건너뛰기 (대소문자 구분 없이)
-                if (file_info['name'].endswith('.md') and 
-                    file_info['name'].lower() != 'readme.md'):
-                    try:
-                        # 파일 내용 다운로드
-                        file_response = requests.get(file_info['download_url'])
-                        if file_response.status_code == 200:
-                            local_path = os.path.join(knowledge_dir, file_info['name'])
-                            with open(local_path, 'w', encoding='utf-8') as f:
-                                f.write(file_response.text)
+                local_path = os.path.join(knowledge_dir, file_info['name'])
+                direction = self._sync_direction(file_info['path'], self._local_blob_sha(file_info['path'], local_path),
+                                                 file_info['sha'])
+                if direction == "same":
+                    self._record_synced(file_info['path'], local_path, file_info['sha'])
+                elif direction == "remote":
+                    pending.append((file_info, local_path))
+                elif direction == "conflict":
+                    self.last_sync_conflicts.append(file_info['path'])
+            
+            downloaded_count = 0
+            if pending:
+                workers = max(1, min(max_workers or self.DOWNLOAD_WORKERS, len(pending)))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = {
+                        executor.submit(self._download_file, file_info['download_url'], local_path): (file_info, local_path)
+                        for file_info, local_path in pending
+                    }
+                    for done, future in enumerate(as_completed(futures), 1):
+                        file_info, local_path = futures[future]
+                        name = file_info['name']
+                        try:
+                            future.result()
+                            self._record_synced(file_info['path'], local_path, file_info['sha'])
                             downloaded_count += 1
-                            print(f"Downloaded: {file_info['name']}")
-                        else:
-                            self._set_error("download_file", file_response)
-                    except Exception as e:
-                        self._set_error("download_file", exc=e)
-            
-            print(f"Successfully downloaded {downloaded_count} knowledge files")
-            if downloaded_count == 0:
-                self.last_error = "No knowledge files found in GitHub/knowledge (excluding README.md)"
-                return False
+                            print(f"Downloaded: {name}")
+                        except Exception as e:
+                            self.last_sync_failures[name] = str(e)
+                            print(f"Download failed: {name} ({e})")
+                        if progress is not None:
+                            progress(name, name not in self.last_sync_failures, done, len(pending))
+            self._save_manifest()
+            
+            print(f"Downloaded {downloaded_count} changed knowledge files "
+                  f"({len(files) - len(pending)} already up to date or changed locally)")
+            if self.last_sync_failures:
+                failed = ", ".join(f"{name}: {error}" for name, error in sorted(self.last_sync_failures.items()))
+                self.last_error = f"download_file failed for {len(self.last_sync_failures)} of {len(pending)} files: {failed}"
+                return downloaded_count > 0
+            if self.last_sync_conflicts:
+                self.last_error = (f"sync_from_github: {len(self.last_sync_conflicts)} files changed both locally "
+                                   f"and on GitHub, kept local: {', '.join(self.last_sync_conflicts)}")
+                return downloaded_count > 0
             
             return True
             
@@ -162,10 +524,11 @@ class GitHubManager:
             if not self.sync_from_github():
                 return False
             
-            # JSON DB 초기화 및 재로드
-            km.json_db = {"documents": {}, "last_updated": datetime.now().isoformat()}
-            km._save_json_db()
-            km.load_existing_knowledge()  # 새로 다운로드한 파일들 로드
+            # JSON DB를 새로 다운로드한 파일들로 교체 (병렬 파싱)
+            result = km.restore_from_files()
+            if result["errors"]:
+                self.last_error = (f"restore_all_knowledge: {len(result['errors'])} files failed to load "
+                                   f"(first: {result['errors'][0]['file']})")
             
             return True
             
@@ -178,7 +541,7 @@ class GitHubManager:
         try:
             # GitHub의 knowledge 폴더에서 해당 ID로 시작하는 파일 찾기
             url = f"{self.base_url}/repos/{self.repo}/contents/knowledge"
-            response = requests.get(url, headers=self.headers)
+            response = self._get(url)
             
             if response.status_code != 200:
                 self._set_error("delete_knowledge_backup(list)", response)
@@ -204,7 +567,7 @@ class GitHubManager:
                 "sha": target_file["sha"]
             }
             
-            delete_response = requests.delete(delete_url, headers=self.headers, json=data)
+            delete_response = self._request("DELETE", delete_url, json=data)
             if delete_response.status_code != 200:
                 self._set_error("delete_knowledge_backup(delete)", delete_response)
                 return False
@@ -219,7 +582,7 @@ class GitHubManager:
         """저장소 정보 가져오기"""
         try:
             url = f"{self.base_url}/repos/{self.repo}"
-            response = requests.get(url, headers=self.headers)
+            response = self._get(url)
             
             if response.status_code == 200:
                 repo_data = response.json()
@@ -242,11 +605,9 @@ class GitHubManager:
             return None
     
     def _upload_file(self, path: str, content: str, commit_message: str) -> bool:
-        """GitHub에 파일 업로드"""
+        """GitHub에 파일 업로드 (이전 업로드로 sha를 알고 있으면 조회 생략)"""
         try:
-            # 파일이 이미 존재하는지 확인
             url = f"{self.base_url}/repos/{self.repo}/contents/{path}"
-            response = requests.get(url, headers=self.headers)
             
             # 파일 내용을 base64로 인코딩
             content_bytes = content.encode('utf-8')
@@ -257,19 +618,34 @@ class GitHubManager:
                 "content": content_b64
             }
             
-            # 파일이 존재하면 sha 추가 (업데이트용)
-            if response.status_code == 200:
-                existing_file = response.json()
-                data["sha"] = existing_file.get("sha")
-            elif response.status_code not in (404, 200):
-                # 조회 자체가 실패
-                self._set_error("check_existing(_upload_file)", response)
-                return False
+            known_sha = self._remote_shas.get(path)
+            if known_sha:
+                data["sha"] = known_sha
+            else:
+                # 파일이 이미 존재하는지 확인
+                response = self._get(url)
+                
+                # 파일이 존재하면 sha 추가 (업데이트용)
+                if response.status_code == 200:
+                    existing_file = response.json()
+                    data["sha"] = existing_file.get("sha")
+                elif response.status_code not in (404, 200):
+                    # 조회 자체가 실패
+                    self._set_error("check_existing(_upload_file)", response)
+                    return False
             
             # 파일 업로드/업데이트
-            upload_response = requests.put(url, headers=self.headers, json=data)
+            upload_response = self._request("PUT", url, json=data)
+            if known_sha and upload_response.status_code in (409, 422):
+                # 다른 곳에서 파일이 바뀜 → sha를 다시 조회해 재시도
+                self._remote_shas.pop(path, None)
+                return self._upload_file(path, content, commit_message)
             ok = upload_response.status_code in [200, 201]
-            if not ok:
+            if ok:
+                sha = (upload_response.json().get("content") or {}).get("sha")
+                if sha:
+                    self._remote_shas[path] = sha
+            else:
                 self._set_error("_upload_file(put)", upload_response)
             return ok
             
@@ -282,7 +658,7 @@ class GitHubManager:
         try:
             # knowledge 폴더 확인
             url = f"{self.base_url}/repos/{self.repo}/contents/knowledge"
-            response = requests.get(url, headers=self.headers)
+            response = self._get(url)
             
             if response.status_code == 404:
                 # 폴더가 없으면 README.md 파일로 폴더 생성
@@ -324,7 +700,7 @@ class GitHubManager:
         """원격에 knowledge_database.json 존재 여부"""
         try:
             url = f"{self.base_url}/repos/{self.repo}/contents/knowledge_database.json"
-            resp = requests.get(url, headers=self.headers)
+            resp = self._get(url)
             return resp.status_code == 200
         except Exception as e:
             self._set_error("has_json_snapshot", exc=e)
@@ -343,7 +719,7 @@ class GitHubManager:
         """원격 JSON 스냅샷을 로컬로 복원"""
         try:
             url = f"{self.base_url}/repos/{self.repo}/contents/knowledge_database.json"
-            resp = requests.get(url, headers=self.headers)
+            resp = self._get(url)
             if resp.status_code != 200:
                 self._set_error("restore_json_db", resp)
                 return False
@@ -352,7 +728,7 @@ class GitHubManager:
             if not download_url:
                 self.last_error = "No download_url for knowledge_database.json"
                 return False
-            raw = requests.get(download_url)
+            raw = self._get(download_url, auth=False)
             if raw.status_code != 200:
                 self._set_error("restore_json_db(download)", raw)
                 return False
@@ -367,16 +743,178 @@ class GitHubManager:
             self._set_error("restore_json_db", exc=e)
             return False
 
+    @staticmethod
+    def _doc_hash(doc: Dict) -> str:
+        return hashlib.sha256(json.dumps(doc, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _state_hash(doc_hashes: Dict[str, str]) -> str:
+        return hashlib.sha256(json.dumps(sorted(doc_hashes.items())).encode('utf-8')).hexdigest()
+
+    def backup_snapshot(self, km) -> bool:
+        """지식 전체를 앱 스냅샷(ct_knowledge_backup.json)으로 백업"""
+        try:
+            documents = km.export_documents()
+            backup_time = datetime.now().isoformat()
+            backup_data = {
+                "backup_time": backup_time,
+                "total_documents": len(documents),
+                "knowledge_db": {
+                    "documents": documents,
+                    "last_updated": km.json_db.get("last_updated", datetime.now().isoformat())
+                }
+            }
+            content = json.dumps(backup_data, ensure_ascii=False, indent=2)
+            ok = self._upload_file(self.SNAPSHOT_PATH, content,
+                                   f"Backup - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            if ok:
+                doc_hashes = {doc_id: self._doc_hash(doc) for doc_id, doc in documents.items()}
+                self._base = {"backup_time": backup_time, "hashes": doc_hashes}
+                self._last_backup_hash = self._state_hash(doc_hashes)
+            return ok
+        except Exception as e:
+            self._set_error("backup_snapshot", exc=e)
+            return False
+
+    def backup_incremental(self, km) -> bool:
+        """변경분만 백업
+
+        - 마지막 백업과 내용 해시가 같으면 네트워크 요청 없이 건너뜀 (last_backup_skipped=True)
+        - 원격 스냅샷 기준 변경/삭제된 문서만 델타 파일(ct_knowledge_delta.json)로 업로드
+        - 기준 스냅샷을 모르거나 델타가 커지면 전체 스냅샷을 다시 업로드
+        """
+        try:
+            self.last_backup_skipped = False
+            documents = km.export_documents()
+            doc_hashes = {doc_id: self._doc_hash(doc) for doc_id, doc in documents.items()}
+            state_hash = self._state_hash(doc_hashes)
+            if state_hash == self._last_backup_hash:
+                self.last_backup_skipped = True
+                return True
+            
+            if self._base is None:
+                return self.backup_snapshot(km)
+            
+            base_hashes = self._base["hashes"]
+            upserts = {doc_id: documents[doc_id] for doc_id, doc_hash in doc_hashes.items()
+                       if base_hashes.get(doc_id) != doc_hash}
+            deletes = [doc_id for doc_id in base_hashes if doc_id not in doc_hashes]
+            if len(upserts) + len(deletes) > max(self.DELTA_MIN_DOCS, len(documents) * self.DELTA_MAX_RATIO):
+                return self.backup_snapshot(km)
+            
+            delta = {
+                "base_backup_time": self._base["backup_time"],
+                "backup_time": datetime.now().isoformat(),
+                "total_documents": len(documents),
+                "upserts": upserts,
+                "deletes": deletes
+            }
+            content = json.dumps(delta, ensure_ascii=False)
+            ok = self._upload_file(self.DELTA_PATH, content,
+                                   f"Delta backup - {len(upserts)} changed, {len(deletes)} deleted")
+            if ok:
+                self._last_backup_hash = state_hash
+            return ok
+        except Exception as e:
+            self._set_error("backup_incremental", exc=e)
+            return False
+
+    def _fetch_json(self, path: str, timeout: int = 10, missing_ok: bool = False) -> Optional[Dict]:
+        """원격 JSON 파일 다운로드 (없거나 실패하면 None)"""
+        url = f"{self.base_url}/repos/{self.repo}/contents/{path}"
+        resp = self._get(url, timeout=timeout)
+        if resp.status_code == 404 and missing_ok:
+            return None
+        if resp.status_code != 200:
+            self._set_error(f"fetch({path})", resp)
+            return None
+        meta = resp.json()
+        if meta.get("sha"):
+            self._remote_shas[path] = meta["sha"]
+        download_url = meta.get("download_url")
+        if not download_url:
+            self.last_error = f"No download_url for {path}"
+            return None
+        raw = self._get(download_url, auth=False, timeout=timeout)
+        if raw.status_code != 200:
+            self._set_error(f"fetch({path})(download)", raw)
+            return None
+        return json.loads(raw.text)
+
+    def fetch_snapshot(self, timeout: int = 10) -> Optional[Dict]:
+        """원격 앱 스냅샷 다운로드 (델타가 있으면 적용, 없거나 실패하면 None)"""
+        try:
+            self.snapshot_missing = False
+            self.last_error = None
+            backup_data = self._fetch_json(self.SNAPSHOT_PATH, timeout=timeout, missing_ok=True)
+            if backup_data is None:
+                if self.last_error is None:
+                    # 404: 아직 한 번도 백업하지 않은 저장소
+                    self.snapshot_missing = True
+                    self.last_error = f"No {self.SNAPSHOT_PATH} on GitHub yet"
+                return None
+            if "knowledge_db" not in backup_data:
+                self.last_error = "Invalid snapshot: missing knowledge_db"
+                return None
+            
+            documents = backup_data["knowledge_db"].setdefault("documents", {})
+            self._base = {
+                "backup_time": backup_data.get("backup_time"),
+                "hashes": {doc_id: self._doc_hash(doc) for doc_id, doc in documents.items()}
+            }
+            
+            # 같은 스냅샷을 기준으로 한 델타만 적용
+            delta = self._fetch_json(self.DELTA_PATH, timeout=timeout, missing_ok=True)
+            if delta and delta.get("base_backup_time") == backup_data.get("backup_time"):
+                documents.update(delta.get("upserts", {}))
+                for doc_id in delta.get("deletes", []):
+                    documents.pop(doc_id, None)
+                backup_data["backup_time"] = delta.get("backup_time", backup_data.get("backup_time"))
+                backup_data["total_documents"] = len(documents)
+            return backup_data
+        except Exception as e:
+            self._set_error("fetch_snapshot", exc=e)
+            return None
+
+    def restore_snapshot(self, km, timeout: int = 10) -> bool:
+        """원격 앱 스냅샷(+델타)으로 로컬 지식 DB 전체를 교체"""
+        backup_data = self.fetch_snapshot(timeout=timeout)
+        if backup_data is None:
+            return False
+        return self.apply_snapshot(km, backup_data)
+
+    def apply_snapshot(self, km, backup_data: Dict, local_changes: Optional[Dict[str, Optional[Dict]]] = None) -> bool:
+        """fetch_snapshot으로 받은 스냅샷으로 로컬 지식 DB 전체를 교체
+
+        local_changes({doc_id: 앱 백업 형식 문서, 삭제면 None})는 스냅샷 위에 덮어 적용하며,
+        이 경우 로컬이 원격과 다르므로 다음 백업에서 해당 문서들이 델타로 올라갑니다.
+        """
+        try:
+            documents = backup_data["knowledge_db"].get("documents", {})
+            if local_changes:
+                merged = dict(documents)
+                for doc_id, doc in local_changes.items():
+                    if doc is None:
+                        merged.pop(doc_id, None)
+                    else:
+                        merged[doc_id] = doc
+                km.import_documents(merged)
+                self._last_backup_hash = None
+                return True
+            km.import_documents(documents)
+            # 복원 직후 상태는 원격과 같으므로 다음 백업은 변경이 생길 때까지 건너뜀
+            restored_hashes = {doc_id: self._doc_hash(doc) for doc_id, doc in km.export_documents().items()}
+            self._last_backup_hash = self._state_hash(restored_hashes)
+            return True
+        except Exception as e:
+            self._set_error("apply_snapshot", exc=e)
+            return False
+
     def list_remote_files(self) -> List[str]:
         """GitHub knowledge 폴더의 파일 목록(README 제외)"""
         try:
-            url = f"{self.base_url}/repos/{self.repo}/contents/knowledge"
-            response = requests.get(url, headers=self.headers)
-            if response.status_code != 200:
-                self._set_error("list_remote_files", response)
-                return []
-            files = response.json()
-            return [f["name"] for f in files if f["name"].endswith(".md") and f["name"].lower() != "readme.md"]
+            files = self._list_remote_knowledge()
+            return [f["name"] for f in files] if files is not None else []
         except Exception as e:
             self._set_error("list_remote_files", exc=e)
             return []
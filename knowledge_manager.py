@@ -1,45 +1,238 @@
 import os
 import json
+import hashlib
 import re
+import bisect
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+
+from context_builder import PassageIndex
+from document import Document, SearchHit
+from oplog import OperationLog, atomic_write_json
+from search_index import InvertedIndex
+from tokenizer import get_analyzer
+
+
+def _index_fields(record: Document) -> Dict[str, str]:
+    """문서 레코드의 검색 필드 (쓰기 시점에 normalize_text로 정규화해 둔 값)"""
+    return record.normalized
+
+
+def parse_markdown(text: str, filename: str) -> Optional[Dict[str, str]]:
+    """지식 마크다운 파일 파싱 (제목/카테고리/태그/생성일/본문, 지식 파일이 아니면 None)"""
+    # 빈 파일이나 너무 짧은 파일 건너뛰기
+    if len(text.strip()) < 10:
+        return None
+    
+    # 기본 파싱
+    lines = text.split('\n')
+    title = lines[0].replace('# ', '').strip() if lines else filename[:-3]
+    
+    # 제목이 비어있으면 건너뛰기
+    if not title or title == filename[:-3]:
+        return None
+    
+    # 메타데이터 추출
+    category = "기타"
+    tags = ""
+    created_at = ""
+    content_start = 0
+    
+    for i, line in enumerate(lines):
+        if line.startswith('**카테고리:**'):
+            category = line.replace('**카테고리:**', '').strip()
+        elif line.startswith('**태그:**'):
+            tags = line.replace('**태그:**', '').strip()
+        elif line.startswith('**생성일:**'):
+            try:
+                created_at = datetime.strptime(line.replace('**생성일:**', '').strip(),
+                                               '%Y-%m-%d %H:%M:%S').isoformat()
+            except ValueError:
+                pass
+        elif line.strip() == '---':
+            content_start = i + 1
+            break
+    
+    # 실제 내용 추출
+    content = '\n'.join(lines[content_start:]).strip()
+    
+    # 내용이 너무 짧으면 건너뛰기
+    if len(content) < 5:
+        return None
+    return {"title": title, "category": category, "tags": tags, "created_at": created_at, "content": content}
+
+
+def _file_record(filename: str, data: bytes, stat: os.stat_result) -> Dict:
+    """파일 매핑에 기록하는 마크다운 파일 정보"""
+    return {"name": filename, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+            "sha256": hashlib.sha256(data).hexdigest()}
+
+
+def _read_markdown_file(filepath: str) -> Dict:
+    """파일 한 개를 읽어 파일 정보와 파싱 결과("parsed")를 반환 (프로세스 풀 작업 함수)
+
+    오류는 예외 대신 "error"에 담아 돌려주므로 한 파일의 실패가 전체 복원을 멈추지 않습니다.
+    """
+    filename = os.path.basename(filepath)
+    try:
+        stat = os.stat(filepath)
+        with open(filepath, 'rb') as f:
+            data = f.read()
+        record = _file_record(filename, data, stat)
+        record["parsed"] = parse_markdown(data.decode('utf-8'), filename)
+        return record
+    except Exception as e:
+        return {"name": filename, "error": f"{type(e).__name__}: {e}"}
+
 
 class KnowledgeManager:
-    def __init__(self):
+    # 작업 로그가 이 개수를 넘으면 스냅샷으로 압축
+    COMPACT_EVERY = 200
+    # 파일 복원 시 이 개수 이상이면 프로세스 풀에서 파싱 (적으면 프로세스 시작 비용이 더 큼)
+    PARALLEL_PARSE_MIN_FILES = 64
+    
+    def __init__(self, analyzer: str = "korean", storage: str = "json", search_mode: str = "keyword"):
         self.knowledge_dir = "./knowledge"
         os.makedirs(self.knowledge_dir, exist_ok=True)
         
         # JSON 기반 데이터베이스
         self.json_db_path = "./knowledge_database.json"
+        self.oplog = OperationLog("./knowledge_database.log.jsonl")
+        self.analyzer = get_analyzer(analyzer)
+        
+        # SQLite 저장소 (storage="sqlite"): 영속화/목록/통계/FTS5 검색을 SQL로 처리
+        self.sqlite_store = None
+        if storage == "sqlite":
+            from sqlite_store import SQLiteKnowledgeStore
+            self.sqlite_store = SQLiteKnowledgeStore()
+            migrated = 0
+            has_json = os.path.exists(self.json_db_path) or self.oplog.count
+            if has_json and not self.sqlite_store.get_meta("migrated_from_json"):
+                # 스냅샷만이 아니라 아직 압축되지 않은 작업 로그까지 재생한 내용을 가져옴
+                migrated = self.sqlite_store.migrate_from_json(self._replay_json_db())
+            if migrated:
+                print(f"Migrated {migrated} documents from {self.json_db_path} to SQLite")
+        elif storage != "json":
+            raise ValueError(f"Unknown storage: {storage}")
+        if search_mode not in ("keyword", "hybrid"):
+            raise ValueError(f"Unknown search mode: {search_mode}")
+        
         self.json_db = self._load_json_db()
         
+        self.last_added_id: Optional[str] = None  # 마지막 add_knowledge로 만든 doc_id
+        
+        # 문서 레코드 (검색 결과/목록이 참조, 쓰기 시 교체)
+        self.records: Dict[str, Document] = {}
+        self._records_source = None
+        self._ensure_records()
+        
+        # 검색용 역색인 (JSON 저장소에서만 사용, 쓰기 시 증분 갱신, 레코드의 정규화된 필드를 색인)
+        self.index = None
+        if self.sqlite_store is None:
+            self.index = InvertedIndex(self.analyzer, fields_of=_index_fields, prenormalized=True)
+            self.index.build(self.records)
+        
+        # AI 프롬프트 자료용 패시지 (쓰기 시 분할)
+        self.passages = PassageIndex(self.analyzer)
+        self.passages.build(self.json_db["documents"])
+        self._passages_source = self.json_db["documents"]
+        
+        # 생성일 정렬 색인 (편집 화면 페이지 목록용, 쓰기 시 갱신)
+        self._created_order: List[Tuple[str, str]] = []  # (created_at, doc_id) 오름차순
+        self._created_of: Dict[str, str] = {}
+        self._created_source = None
+        
+        # 의미 검색용 패시지 벡터 (search_mode="hybrid", 변경된 문서만 다시 임베딩)
+        self.vectors = None
+        if search_mode == "hybrid":
+            from vector_index import VectorIndex
+            self.vectors = VectorIndex()
+            self.vectors.sync(self.json_db["documents"])
+        
         # 초기 실행시 기존 마크다운 파일들 로드
         self.load_existing_knowledge()
-        print("Knowledge Manager initialized with JSON database")
+        print(f"Knowledge Manager initialized with {'SQLite' if self.sqlite_store else 'JSON'} database")
     
     def _load_json_db(self) -> Dict:
-        """JSON 데이터베이스 로드"""
+        """JSON 데이터베이스 로드 (스냅샷 + 작업 로그 재생)"""
+        if self.sqlite_store is not None:
+            return {
+                "documents": self.sqlite_store.load_documents(),
+                "files": self.sqlite_store.load_files(),
+                "last_updated": self.sqlite_store.last_updated()
+            }
+        return self._replay_json_db()
+    
+    def _replay_json_db(self) -> Dict:
+        """JSON 스냅샷을 읽고 작업 로그를 재생한 결과 (SQLite로 옮길 때도 사용)"""
+        json_db = {"documents": {}, "last_updated": datetime.now().isoformat()}
         if os.path.exists(self.json_db_path):
             try:
                 with open(self.json_db_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                    json_db = json.load(f)
             except Exception as e:
                 print(f"Error loading JSON DB: {e}")
-        return {"documents": {}, "last_updated": datetime.now().isoformat()}
+        
+        try:
+            for op in self.oplog.replay():
+                if op["op"] == "put":
+                    json_db["documents"][op["id"]] = op["doc"]
+                elif op["op"] == "delete":
+                    json_db["documents"].pop(op["id"], None)
+                elif op["op"] == "file":
+                    if op.get("file") is None:
+                        json_db.setdefault("files", {}).pop(op["id"], None)
+                    else:
+                        json_db.setdefault("files", {})[op["id"]] = op["file"]
+                json_db["last_updated"] = op.get("ts", json_db.get("last_updated"))
+        except Exception as e:
+            print(f"Error replaying operation log: {e}")
+        return json_db
     
     def _save_json_db(self):
-        """JSON 데이터베이스 저장"""
+        """JSON 데이터베이스 스냅샷 저장 (원자적 교체 후 작업 로그 비움)"""
         try:
             self.json_db["last_updated"] = datetime.now().isoformat()
-            with open(self.json_db_path, 'w', encoding='utf-8') as f:
-                json.dump(self.json_db, f, ensure_ascii=False, indent=2)
+            if self.sqlite_store is not None:
+                self.sqlite_store.replace_all(self.json_db["documents"], self._file_map())
+                return
+            atomic_write_json(self.json_db_path, self.json_db)
+            self.oplog.truncate()
         except Exception as e:
             print(f"Error saving JSON DB: {e}")
     
+    def _append_op(self, op: str, doc_id: str):
+        """변경 한 건을 작업 로그에 기록 (일정 개수마다 스냅샷으로 압축)"""
+        try:
+            now = datetime.now().isoformat()
+            self.json_db["last_updated"] = now
+            if self.sqlite_store is not None:
+                if op == "put":
+                    self.sqlite_store.upsert(doc_id, self.json_db["documents"][doc_id])
+                elif op == "file":
+                    self.sqlite_store.put_file(doc_id, self._file_map().get(doc_id))
+                else:
+                    self.sqlite_store.delete(doc_id)
+                return
+            entry = {"op": op, "id": doc_id, "ts": now}
+            if op == "put":
+                entry["doc"] = self.json_db["documents"][doc_id]
+            elif op == "file":
+                entry["file"] = self._file_map().get(doc_id)
+            self.oplog.append(entry)
+            if self.oplog.count >= self.COMPACT_EVERY:
+                self._save_json_db()
+        except Exception as e:
+            print(f"Error writing operation log: {e}")
+    
     def add_knowledge(self, title: str, content: str, category: str, tags: str = "") -> bool:
         try:
             # 고유 ID 생성
             doc_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{abs(hash(title)) % 10000}"
+            self.last_added_id = doc_id
             
             # 메타데이터 준비
             metadata = {
@@ -54,7 +247,8 @@ class KnowledgeManager:
                 "content": content,
                 "metadata": metadata
             }
-            self._save_json_db()
+            self._index_put(doc_id)
+            self._append_op("put", doc_id)
             
             # 마크다운 파일로 저장
             self._save_to_markdown(doc_id, title, content, category, tags)
@@ -65,30 +259,45 @@ class KnowledgeManager:
             print(f"Error adding knowledge: {e}")
             return False
     
-    def get_all_knowledge(self) -> List[Dict]:
+    def get_all_knowledge(self) -> List[Document]:
         """모든 지식 목록 가져오기"""
         try:
-            knowledge_list = []
-            
-            for doc_id, data in self.json_db["documents"].items():
-                metadata = data["metadata"]
-                knowledge_list.append({
-                    'id': doc_id,
-                    'title': metadata['title'],
-                    'content': data['content'],
-                    'category': metadata['category'],
-                    'tags': metadata.get('tags', ''),
-                    'created_at': metadata.get('created_at', '')
-                })
+            self._ensure_records()
+            if self.sqlite_store is not None:
+                return [self.records[doc_id] for doc_id in self.sqlite_store.list_ids()]
             
             # 생성일 순으로 정렬 (최신순)
-            knowledge_list.sort(key=lambda x: x['created_at'], reverse=True)
-            return knowledge_list
+            self._ensure_listing()
+            return [self.records[doc_id] for _, doc_id in reversed(self._created_order)]
             
         except Exception as e:
             print(f"Error getting all knowledge: {e}")
             return []
     
+    def list_summaries(self, offset: int = 0, limit: int = 20) -> Tuple[List[Document], int]:
+        """생성일 최신순 문서 레코드 한 페이지와 전체 수
+
+        전체를 정렬하지 않고 생성일 색인(JSON: 유지 중인 목록, SQLite: created_at 인덱스)에서
+        잘라내며, 새 dict 대신 문서 레코드를 그대로 돌려줍니다.
+        """
+        self._ensure_records()
+        if self.sqlite_store is not None:
+            ids = self.sqlite_store.list_ids(offset, limit)
+            return [self.records[doc_id] for doc_id in ids], self.sqlite_store.count()
+        
+        self._ensure_listing()
+        total = len(self._created_order)
+        end = max(total - offset, 0)
+        start = max(end - limit, 0)
+        return [self.records[doc_id] for _, doc_id in reversed(self._created_order[start:end])], total
+    
+    def get_document(self, doc_id: str) -> Optional[Document]:
+        """문서 하나의 레코드 (없으면 None)"""
+        if doc_id not in self.json_db["documents"]:
+            return None
+        self._ensure_records()
+        return self.records[doc_id]
+    
     def update_knowledge(self, doc_id: str, title: str, content: str, category: str, tags: str = "") -> bool:
         """기존 지식 업데이트"""
         try:
@@ -109,7 +318,8 @@ class KnowledgeManager:
                 "content": content,
                 "metadata": metadata
             }
-            self._save_json_db()
+            self._index_put(doc_id)
+            self._append_op("put", doc_id)
             
             # 기존 마크다운 파일 업데이트
             self._update_markdown_file(doc_id, title, content, category, tags)
@@ -127,7 +337,8 @@ class KnowledgeManager:
             if doc_id in self.json_db["documents"]:
                 title = self.json_db["documents"][doc_id]["metadata"]["title"]
                 del self.json_db["documents"][doc_id]
-                self._save_json_db()
+                self._index_remove(doc_id)
+                self._append_op("delete", doc_id)
                 print(f"Deleted knowledge: {title}")
             
             # 마크다운 파일 삭제
@@ -138,231 +349,489 @@ class KnowledgeManager:
             print(f"Error deleting knowledge: {e}")
             return False
     
-    def search_knowledge(self, query: str, n_results: int = 5) -> List[Dict]:
-        """키워드 기반 지식 검색"""
+    def search_knowledge(self, query: str, n_results: int = 5, prefix: bool = False,
+                         strict: bool = False) -> List[SearchHit]:
+        """키워드 기반 지식 검색 (prefix=True: 입력 중 검색, 마지막 단어를 접두어로 취급)
+
+        오류가 나면 빈 목록을 반환하며, strict=True이면 오류를 그대로 던집니다
+        (결과를 캐시하는 호출 측이 실패한 검색을 빈 결과로 저장하지 않도록).
+        """
         try:
-            return self._smart_search(query, n_results)
+            return self._smart_search(query, n_results, prefix)
         except Exception as e:
+            if strict:
+                raise
             print(f"Error searching knowledge: {e}")
             return []
     
-    def _smart_search(self, query: str, n_results: int = 5) -> List[Dict]:
-        """향상된 키워드 검색"""
+    def _ensure_index(self):
+        """json_db가 통째로 교체된 경우(복원 등) 역색인과 패시지 재구성 (레코드도 함께 다시 만들어짐)"""
+        self._ensure_records()
+        if self.index is not None and self.index.source is not self.records:
+            self.index.build(self.records)
+        self._ensure_passages()
+    
+    def _ensure_passages(self):
+        """AI 자료용 패시지를 json_db와 맞춤 (역색인이 없는 SQLite 저장소도 함께 재구성)"""
+        documents = self.json_db["documents"]
+        if self._passages_source is not documents:
+            self.passages.build(documents)
+            self._passages_source = documents
+    
+    def _index_put(self, doc_id: str):
+        self._record_put(doc_id)
+        if self.index is not None:
+            self._ensure_index()
+            self.index.add(doc_id, self.records[doc_id])
+        self._ensure_passages()
+        self.passages.put(doc_id, self.json_db["documents"][doc_id]["content"])
+        self._listing_put(doc_id)
+        if self.vectors is not None:
+            self._ensure_vectors()
+            self.vectors.put(doc_id, self.json_db["documents"][doc_id])
+    
+    def _index_remove(self, doc_id: str):
+        self._ensure_records()
+        self.records.pop(doc_id, None)
+        if self.index is not None:
+            self._ensure_index()
+            self.index.remove(doc_id)
+        self._ensure_passages()
+        self.passages.remove(doc_id)
+        self._ensure_listing()
+        self._listing_remove(doc_id)
+        if self.vectors is not None:
+            self._ensure_vectors()
+            self.vectors.remove(doc_id)
+    
+    def _ensure_records(self):
+        """문서 레코드를 json_db와 맞춤 (통째로 교체된 경우 재구성)"""
+        documents = self.json_db["documents"]
+        if self._records_source is not documents:
+            self.records = {}
+            self._records_source = documents
+            for doc_id in documents:
+                self._record_put(doc_id)
+    
+    def _record_put(self, doc_id: str):
+        self._ensure_records()
+        data = self.json_db["documents"][doc_id]
+        record = Document.from_data(doc_id, data)
+        # 저장소 dict도 intern된 카테고리 문자열을 함께 쓰도록 교체
+        data["metadata"]["category"] = record.category
+        self.records[doc_id] = record
+    
+    def _ensure_listing(self):
+        """생성일 정렬 색인을 json_db와 맞춤 (통째로 교체된 경우 재구성)"""
+        documents = self.json_db["documents"]
+        if self._created_source is not documents:
+            self._created_of = {doc_id: data["metadata"].get("created_at", "") for doc_id, data in documents.items()}
+            self._created_order = sorted((created_at, doc_id) for doc_id, created_at in self._created_of.items())
+            self._created_source = documents
+    
+    def _listing_remove(self, doc_id: str):
+        created_at = self._created_of.pop(doc_id, None)
+        if created_at is not None:
+            i = bisect.bisect_left(self._created_order, (created_at, doc_id))
+            if i < len(self._created_order) and self._created_order[i] == (created_at, doc_id):
+                del self._created_order[i]
+    
+    def _listing_put(self, doc_id: str):
+        self._ensure_listing()
+        self._listing_remove(doc_id)
+        created_at = self.json_db["documents"][doc_id]["metadata"].get("created_at", "")
+        self._created_of[doc_id] = created_at
+        bisect.insort(self._created_order, (created_at, doc_id))
+    
+    def _ensure_vectors(self):
+        """json_db가 통째로 교체된 경우 벡터 색인을 맞춤 (내용이 바뀐 문서만 다시 임베딩)"""
+        if self.vectors is not None and self.vectors.source is not self.json_db["documents"]:
+            self.vectors.sync(self.json_db["documents"])
+    
+    def _smart_search(self, query: str, n_results: int = 5, prefix: bool = False) -> List[SearchHit]:
+        """향상된 키워드 검색 (역색인 + BM25F 랭킹, hybrid 모드에서는 의미 검색과 RRF 결합)"""
         results = []
-        query_lower = query.lower()
-        query_words = [word.strip() for word in query_lower.split() if len(word.strip()) > 1]
+        # hybrid 모드는 두 순위를 합치므로 후보를 넉넉히 가져옴
+        limit = n_results * 2 if self.vectors is not None else n_results
+        if self.sqlite_store is not None:
+            # FTS5 질의는 모든 색인어를 이미 접두어로 검색
+            hits = self.sqlite_store.search(self.analyzer.analyze(query), limit)
+        else:
+            self._ensure_index()
+            hits = self.index.search(query, limit, prefix=prefix)
         
-        try:
-            for doc_id, data in self.json_db["documents"].items():
-                metadata = data["metadata"]
-                content = data["content"]
-                
-                # 검색 점수 계산
-                score = 0
-                
-                # 1. 제목에서 검색
-                title_lower = metadata['title'].lower()
-                for word in query_words:
-                    if word in title_lower:
-                        score += 15  # 제목 매치는 높은 점수
-                
-                # 2. 전체 제목이 쿼리를 포함하는 경우
-                if query_lower in title_lower:
-                    score += 20
-                
-                # 3. 카테고리에서 검색
-                category_lower = metadata['category'].lower()
-                if query_lower in category_lower:
-                    score += 10
-                
-                # 4. 태그에서 검색
-                tags_lower = metadata.get('tags', '').lower()
-                for word in query_words:
-                    if word in tags_lower:
-                        score += 12
-                
-                # 5. 내용에서 검색
-                content_lower = content.lower()
-                content_matches = 0
-                for word in query_words:
-                    content_matches += content_lower.count(word)
-                score += min(content_matches * 3, 15)  # 내용 매치, 최대 15점
-                
-                # 6. 전체 쿼리가 내용에 있는 경우
-                if query_lower in content_lower:
-                    score += 8
-                
-                # 점수가 있는 경우만 결과에 포함
-                if score > 0:
-                    results.append({
-                        'id': doc_id,
-                        'title': metadata['title'],
-                        'content': content,
-                        'category': metadata['category'],
-                        'tags': metadata.get('tags', ''),
-                        'score': score
-                    })
-            
-            # 점수 순으로 정렬하고 상위 n개 반환
-            results.sort(key=lambda x: x['score'], reverse=True)
-            return results[:n_results]
-            
-        except Exception as e:
-            print(f"Error in smart search: {e}")
-            return []
+        if self.vectors is not None:
+            # 키워드 순위와 의미 검색 순위를 RRF로 합침 (점수는 RRF × 100)
+            from vector_index import reciprocal_rank_fusion
+            self._ensure_vectors()
+            fused = reciprocal_rank_fusion([hits, self.vectors.search(query, limit)])
+            hits = [(doc_id, score * 100) for doc_id, score in fused[:n_results]]
+        
+        self._ensure_records()
+        for doc_id, score in hits:
+            results.append(SearchHit(self.records[doc_id], round(score, 2)))
+        return results
 
-    def _save_to_markdown(self, doc_id: str, title: str, content: str, category: str, tags: str):
+    def _markdown_filename(self, doc_id: str, title: str) -> str:
         # 파일명에서 특수문자 제거
         safe_title = re.sub(r'[^\w\s-]', '', title).strip()
         safe_title = re.sub(r'[-\s]+', '_', safe_title)[:50]  # 길이 제한
-        filename = f"{doc_id}_{safe_title}.md"
+        return f"{doc_id}_{safe_title}.md"
+    
+    def _file_map(self) -> Dict[str, Dict]:
+        """doc_id → 마크다운 파일 정보({"name", "mtime_ns", "size", "sha256"}) (저장소와 함께 영속화)"""
+        return self.json_db.setdefault("files", {})
+    
+    def _set_file(self, doc_id: str, record: Optional[Dict]):
+        """파일 매핑 한 건 변경 후 작업 로그에 기록 (record=None이면 삭제)"""
+        files = self._file_map()
+        if record is None:
+            if files.pop(doc_id, None) is None:
+                return
+        else:
+            files[doc_id] = record
+        self._append_op("file", doc_id)
+    
+    def _write_markdown(self, filepath: str, title: str, content: str, category: str, tags: str,
+                        created_at: str) -> bytes:
+        """임시 파일에 쓴 뒤 rename으로 교체 (읽는 쪽이 쓰다 만 파일을 보지 않음, 쓴 내용 반환)"""
+        try:
+            created = datetime.fromisoformat(created_at)
+        except ValueError:
+            created = datetime.now()
+        data = (
+            f"# {title}\n\n"
+            f"**카테고리:** {category}\n"
+            f"**태그:** {tags}\n"
+            f"**생성일:** {created.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+            "---\n\n"
+            f"{content}"
+        ).encode('utf-8')
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".part", dir=self.knowledge_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, filepath)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return data
+    
+    def _save_to_markdown(self, doc_id: str, title: str, content: str, category: str, tags: str):
+        filename = self._markdown_filename(doc_id, title)
         filepath = os.path.join(self.knowledge_dir, filename)
-        
+        created_at = self.json_db["documents"].get(doc_id, {}).get("metadata", {}).get("created_at", "")
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(f"# {title}\n\n")
-                f.write(f"**카테고리:** {category}\n")
-                f.write(f"**태그:** {tags}\n")
-                f.write(f"**생성일:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                f.write("---\n\n")
-                f.write(content)
+            data = self._write_markdown(filepath, title, content, category, tags, created_at)
+            # 방금 쓴 파일의 정보를 기록해 다음 시작 때 다시 파싱하지 않게 함
+            self._set_file(doc_id, _file_record(filename, data, os.stat(filepath)))
         except Exception as e:
             print(f"Error saving markdown file: {e}")
     
     def _update_markdown_file(self, doc_id: str, title: str, content: str, category: str, tags: str):
-        """마크다운 파일 업데이트"""
+        """마크다운 파일 업데이트 (제목이 바뀌어 파일명이 달라지면 새 파일을 쓴 뒤 기존 파일 삭제)"""
         try:
-            # 기존 파일 찾아서 삭제
-            if os.path.exists(self.knowledge_dir):
-                for filename in os.listdir(self.knowledge_dir):
-                    if filename.startswith(doc_id) and filename.endswith('.md'):
-                        old_filepath = os.path.join(self.knowledge_dir, filename)
-                        if os.path.exists(old_filepath):
-                            os.remove(old_filepath)
-                        break
-            
-            # 새 파일 생성
+            old = self._file_map().get(doc_id)
             self._save_to_markdown(doc_id, title, content, category, tags)
-                
+            new = self._file_map().get(doc_id)
+            if old and new and old["name"] != new["name"]:
+                old_filepath = os.path.join(self.knowledge_dir, old["name"])
+                if os.path.exists(old_filepath):
+                    os.remove(old_filepath)
         except Exception as e:
             print(f"Error updating markdown file: {e}")
     
     def _delete_markdown_file(self, doc_id: str):
         """마크다운 파일 삭제"""
         try:
-            if os.path.exists(self.knowledge_dir):
-                for filename in os.listdir(self.knowledge_dir):
-                    if filename.startswith(doc_id) and filename.endswith('.md'):
-                        filepath = os.path.join(self.knowledge_dir, filename)
-                        if os.path.exists(filepath):
-                            os.remove(filepath)
-                        break
+            record = self._file_map().get(doc_id)
+            if record:
+                filepath = os.path.join(self.knowledge_dir, record["name"])
+                if os.path.exists(filepath):
+                    os.remove(filepath)
+                self._set_file(doc_id, None)
         except Exception as e:
             print(f"Error deleting markdown file: {e}")
     
+    def _sync_markdown_files(self, previous: Dict[str, Dict]):
+        """DB 전체 교체 후 마크다운 폴더를 문서들과 일치시킴 (파일 매핑은 저장 시 함께 영속화)
+
+        내용이 그대로이고 파일도 남아 있는 문서는 건너뛰고, 새로 생기거나 바뀐 문서만 다시 씁니다.
+        DB에 없는 문서의 파일과 매핑에 없는 .md 파일은 삭제합니다.
+        """
+        os.makedirs(self.knowledge_dir, exist_ok=True)
+        documents = self.json_db["documents"]
+        files = {doc_id: record for doc_id, record in self._file_map().items() if doc_id in documents}
+        
+        for doc_id, data in documents.items():
+            record = files.get(doc_id)
+            if (record and "sha256" in record and previous.get(doc_id) == data
+                    and os.path.exists(os.path.join(self.knowledge_dir, record["name"]))):
+                continue
+            metadata = data["metadata"]
+            filename = self._markdown_filename(doc_id, metadata["title"])
+            filepath = os.path.join(self.knowledge_dir, filename)
+            try:
+                written = self._write_markdown(filepath, metadata["title"], data["content"], metadata["category"],
+                                               metadata.get("tags", ""), metadata.get("created_at", ""))
+                files[doc_id] = _file_record(filename, written, os.stat(filepath))
+            except Exception as e:
+                print(f"Error saving markdown file: {e}")
+        
+        self.json_db["files"] = files
+        kept = {record["name"] for record in files.values()}
+        for filename in os.listdir(self.knowledge_dir):
+            if filename.endswith('.md') and filename.lower() != 'readme.md' and filename not in kept:
+                try:
+                    os.remove(os.path.join(self.knowledge_dir, filename))
+                except OSError as e:
+                    print(f"Error deleting markdown file: {e}")
+    
+    def _rebuild_file_map(self, filenames: List[str]) -> bool:
+        """폴더 목록 한 번으로 파일 매핑을 맞춤 (없어진 파일은 빼고 새 파일은 추가, 변경 여부 반환)
+
+        저장된 매핑을 우선하므로 doc_id가 서로 접두어 관계여도 다른 문서의 파일과 섞이지 않습니다.
+        """
+        present = set(filenames)
+        files = self._file_map()
+        kept = {doc_id: record for doc_id, record in files.items() if record.get("name") in present}
+        claimed = {record["name"] for record in kept.values()}
+        for filename in sorted(present - claimed):
+            kept.setdefault(self._doc_id_from_filename(filename), {"name": filename})
+        if kept == files:
+            return False
+        self.json_db["files"] = kept
+        return True
+    
+    def _doc_id_from_filename(self, filename: str) -> str:
+        """마크다운 파일명({doc_id}_{제목}.md)에서 doc_id 추출
+
+        DB에 이미 있는 문서의 파일이면 그 doc_id를, 아니면 확장자를 뗀 파일명을 사용합니다.
+        """
+        stem = filename[:-3] if filename.endswith('.md') else filename
+        if stem in self.json_db["documents"]:
+            return stem
+        match = re.match(r'^(\d{8}_\d{6}_\d+)_', stem)
+        if match and match.group(1) in self.json_db["documents"]:
+            return match.group(1)
+        return stem
+    
+    def _load_markdown(self, doc_id: str, record: Dict) -> Tuple[bool, Dict]:
+        """파일 한 개를 필요할 때만 다시 읽음 (문서 변경 여부, 새 파일 정보)
+
+        (mtime, 크기)가 기록과 같으면 열지 않고, 달라도 내용 해시가 같으면 파싱하지 않습니다.
+        """
+        filename = record["name"]
+        filepath = os.path.join(self.knowledge_dir, filename)
+        stat = os.stat(filepath)
+        known = doc_id in self.json_db["documents"] or record.get("skipped")
+        if known and record.get("mtime_ns") == stat.st_mtime_ns and record.get("size") == stat.st_size:
+            return False, record
+        
+        with open(filepath, 'rb') as f:
+            data = f.read()
+        new_record = _file_record(filename, data, stat)
+        if known and record.get("sha256") == new_record["sha256"]:
+            if record.get("skipped"):
+                new_record["skipped"] = True
+            return False, new_record
+        
+        parsed = parse_markdown(data.decode('utf-8'), filename)
+        if parsed is None:
+            new_record["skipped"] = True
+            return False, new_record
+        
+        old = self.json_db["documents"].get(doc_id)
+        metadata = {"title": parsed["title"], "category": parsed["category"], "tags": parsed["tags"]}
+        if old is not None:
+            # 기존 생성일 유지, 바깥에서 바뀐 파일이면 수정일 갱신
+            old_metadata = old["metadata"]
+            metadata["created_at"] = old_metadata.get("created_at") or datetime.now().isoformat()
+            unchanged = old["content"] == parsed["content"] and all(
+                old_metadata.get(key, "") == metadata[key] for key in ("title", "category", "tags"))
+            if unchanged:
+                return False, new_record
+            metadata["updated_at"] = datetime.now().isoformat()
+        else:
+            # 파일의 생성일 줄, 없으면 파일 수정 시각
+            metadata["created_at"] = parsed["created_at"] or datetime.fromtimestamp(stat.st_mtime).isoformat()
+        
+        self.json_db["documents"][doc_id] = {"content": parsed["content"], "metadata": metadata}
+        self._index_put(doc_id)
+        return True, new_record
+    
     def load_existing_knowledge(self):
-        """기존 마크다운 파일들을 JSON DB로 로드"""
+        """기존 마크다운 파일들을 JSON DB로 로드 (새로 생기거나 바뀐 파일만 파싱)
+
+        파일별 (mtime, 크기, 내용 해시)를 파일 매핑에 기록해 두므로 바뀐 것이 없으면
+        파일을 열지도, DB를 다시 저장하지도 않습니다.
+        """
         if not os.path.exists(self.knowledge_dir):
             return
             
         loaded_count = 0
         
         try:
-            for filename in os.listdir(self.knowledge_dir):
-                # README.md 파일은 건너뛰도록 수정 (대소문자 구분 없이)
-                if filename.endswith('.md') and filename.lower() != 'readme.md':
-                    filepath = os.path.join(self.knowledge_dir, filename)
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        
-                        # 빈 파일이나 너무 짧은 파일 건너뛰기
-                        if len(content.strip()) < 10:
-                            continue
-                            
-                        # 기본 파싱
-                        lines = content.split('\n')
-                        title = lines[0].replace('# ', '').strip() if lines else filename[:-3]
-                        
-                        # 제목이 비어있으면 건너뛰기
-                        if not title or title == filename[:-3]:
-                            continue
-                        
-                        # 메타데이터 추출
-                        category = "기타"
-                        tags = ""
-                        content_start = 0
-                        
-                        for i, line in enumerate(lines):
-                            if line.startswith('**카테고리:**'):
-                                category = line.replace('**카테고리:**', '').strip()
-                            elif line.startswith('**태그:**'):
-                                tags = line.replace('**태그:**', '').strip()
-                            elif line.strip() == '---':
-                                content_start = i + 1
-                                break
-                        
-                        # 실제 내용 추출
-                        actual_content = '\n'.join(lines[content_start:]).strip()
-                        
-                        # 내용이 너무 짧으면 건너뛰기
-                        if len(actual_content) < 5:
-                            continue
-                        
-                        # 파일명에서 doc_id 추출 (타임스탬프 부분)
-                        doc_id = filename.replace('.md', '')
-                        
-                        # JSON DB에 추가 (기존 데이터 덮어쓰기)
-                        metadata = {
-                            "title": title,
-                            "category": category,
-                            "tags": tags,
-                            "created_at": datetime.now().isoformat()
-                        }
-                        
-                        self.json_db["documents"][doc_id] = {
-                            "content": actual_content,
-                            "metadata": metadata
-                        }
-                        loaded_count += 1
-                        print(f"Loaded: {title}")
-                        
-                    except Exception as e:
-                        print(f"Error loading {filename}: {e}")
-                        continue
+            # README.md 파일은 건너뛰도록 수정 (대소문자 구분 없이)
+            filenames = [filename for filename in os.listdir(self.knowledge_dir)
+                         if filename.endswith('.md') and filename.lower() != 'readme.md']
+            files_changed = self._rebuild_file_map(filenames)
+            files = self._file_map()
             
-            if loaded_count > 0:
+            for doc_id, record in list(files.items()):
+                try:
+                    loaded, new_record = self._load_markdown(doc_id, record)
+                except Exception as e:
+                    print(f"Error loading {record['name']}: {e}")
+                    continue
+                if new_record != record:
+                    files[doc_id] = new_record
+                    files_changed = True
+                if loaded:
+                    loaded_count += 1
+                    print(f"Loaded: {self.json_db['documents'][doc_id]['metadata']['title']}")
+            
+            if loaded_count > 0 or files_changed:
                 self._save_json_db()
+            if loaded_count > 0:
                 print(f"Successfully loaded {loaded_count} knowledge files")
-            else:
-                print("No valid knowledge files found to load")
                 
         except Exception as e:
             print(f"Error in load_existing_knowledge: {e}")
 
-    def restore_from_files(self):
+    def _read_markdown_files(self, filepaths: List[str], max_workers: Optional[int] = None) -> List[Dict]:
+        """파일들을 읽고 파싱 (많으면 프로세스 풀 사용, 풀을 쓸 수 없는 환경이면 순차 처리)
+
+        스레드(백그라운드 갱신, 잠금)가 있는 Streamlit 프로세스를 fork하면 자식이 멈출 수
+        있으므로 작업 프로세스는 spawn으로 새로 시작합니다.
+        """
+        if len(filepaths) >= self.PARALLEL_PARSE_MIN_FILES and max_workers != 1:
+            workers = max_workers or os.cpu_count() or 1
+            try:
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                    return list(pool.map(_read_markdown_file, filepaths,
+                                         chunksize=max(1, len(filepaths) // (workers * 4))))
+            except Exception as e:
+                print(f"Parallel parsing unavailable, parsing serially: {e}")
+        return [_read_markdown_file(filepath) for filepath in filepaths]
+    
+    def restore_from_files(self, max_workers: Optional[int] = None) -> Dict:
         """
         knowledge 폴더의 모든 .md 파일을 기반으로 JSON DB를 완전히 새로고침합니다.
         GitHub에서 복원 후 사용됩니다.
+        
+        파일 파싱은 프로세스 풀에서 병렬로 하고, 결과는 한 번에 DB에 반영해 한 번만 저장합니다.
+        반환값: {"loaded": 문서 수, "skipped": [지식 파일이 아닌 파일명], "errors": [{"file", "error"}]}
         """
         print("Restoring knowledge base from files...")
+        result = {"loaded": 0, "skipped": [], "errors": []}
         
-        # 1. 데이터베이스 완전 초기화
-        self.json_db = {"documents": {}, "last_updated": datetime.now().isoformat()}
+        # 1. 파일 목록과 파일 매핑 (매핑은 유지해 기존 doc_id를 그대로 사용)
+        filenames = []
+        if os.path.exists(self.knowledge_dir):
+            filenames = [filename for filename in os.listdir(self.knowledge_dir)
+                         if filename.endswith('.md') and filename.lower() != 'readme.md']
+        previous = self.json_db["documents"]
+        self._rebuild_file_map(filenames)
+        files = self._file_map()
         
-        # 2. knowledge 폴더의 모든 파일 다시 로드
-        self.load_existing_knowledge()
+        # 2. 병렬 파싱
+        doc_ids = list(files)
+        records = self._read_markdown_files(
+            [os.path.join(self.knowledge_dir, files[doc_id]["name"]) for doc_id in doc_ids], max_workers)
         
-        # 3. 변경사항 저장
+        # 3. 결과 병합 (기존 문서의 생성일/수정일 유지)
+        documents = {}
+        for doc_id, record in zip(doc_ids, records):
+            if "error" in record:
+                result["errors"].append({"file": record["name"], "error": record["error"]})
+                files[doc_id] = {"name": record["name"]}  # 다음 로드 때 다시 시도
+                if doc_id in previous:
+                    documents[doc_id] = previous[doc_id]  # 읽지 못한 파일의 기존 문서는 유지
+                continue
+            parsed = record.pop("parsed")
+            if parsed is None:
+                record["skipped"] = True
+                files[doc_id] = record
+                result["skipped"].append(record["name"])
+                continue
+            old_metadata = previous.get(doc_id, {}).get("metadata", {})
+            metadata = {
+                "title": parsed["title"],
+                "category": parsed["category"],
+                "tags": parsed["tags"],
+                "created_at": (old_metadata.get("created_at") or parsed["created_at"]
+                               or datetime.fromtimestamp(record["mtime_ns"] / 1e9).isoformat())
+            }
+            if old_metadata.get("updated_at"):
+                metadata["updated_at"] = old_metadata["updated_at"]
+            documents[doc_id] = {"content": parsed["content"], "metadata": metadata}
+            files[doc_id] = record
+        
+        # 4. DB 교체 후 색인 재구성, 한 번만 저장 (SQLite는 한 트랜잭션)
+        self.json_db = {"documents": documents, "files": files, "last_updated": datetime.now().isoformat()}
+        self._ensure_index()
+        self._ensure_vectors()
         self._save_json_db()
         
-        # 4. 결과 확인
-        stats = self.get_stats()
-        print(f"Knowledge base restored: {stats['total_documents']} documents loaded")
+        result["loaded"] = len(documents)
+        for error in result["errors"]:
+            print(f"Error loading {error['file']}: {error['error']}")
+        print(f"Knowledge base restored: {result['loaded']} documents loaded")
+        return result
+
+    def export_documents(self) -> Dict[str, Dict]:
+        """앱 백업 형식({doc_id: {"id", "title", "content", "category", "tags", "created_at", ...}})으로 내보내기"""
+        documents = {}
+        for doc_id, data in self.json_db["documents"].items():
+            metadata = data["metadata"]
+            doc = {
+                "id": doc_id,
+                "title": metadata["title"],
+                "content": data["content"],
+                "category": metadata["category"],
+                "tags": metadata.get("tags", ""),
+                "created_at": metadata.get("created_at", "")
+            }
+            if metadata.get("updated_at"):
+                doc["updated_at"] = metadata["updated_at"]
+            documents[doc_id] = doc
+        return documents
+    
+    def import_documents(self, documents: Dict[str, Dict]):
+        """앱 백업 형식 문서들로 DB 전체를 교체 (GitHub 스냅샷 복원 등)"""
+        imported = {}
+        for doc_id, doc in documents.items():
+            metadata = {
+                "title": doc["title"],
+                "category": doc["category"],
+                "tags": doc.get("tags", ""),
+                "created_at": doc.get("created_at") or datetime.now().isoformat()
+            }
+            if doc.get("updated_at"):
+                metadata["updated_at"] = doc["updated_at"]
+            imported[doc_id] = {"content": doc["content"], "metadata": metadata}
+        
+        previous = self.json_db["documents"]
+        self.json_db = {"documents": imported, "files": self._file_map(), "last_updated": datetime.now().isoformat()}
+        # 마크다운 파일도 가져온 문서들에 맞춰야 다음 시작 때 지워진 문서가 되살아나지 않음
+        self._sync_markdown_files(previous)
+        self._ensure_index()
+        self._ensure_vectors()
+        self._save_json_db()
 
     def get_stats(self) -> Dict:
         """지식 데이터베이스 통계"""
         try:
+            if self.sqlite_store is not None:
+                return {
+                    "total_documents": self.sqlite_store.count(),
+                    "categories": self.sqlite_store.category_counts(),
+                    "last_updated": self.sqlite_store.last_updated()
+                }
+            
             total_docs = len(self.json_db["documents"])
             categories = {}
             
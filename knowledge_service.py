@@ -0,0 +1,338 @@
+import json
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from context_builder import DEFAULT_CONTEXT_CHARS, build_context
+from document import Document, SearchHit
+from github_manager import GitHubManager
+from knowledge_manager import KnowledgeManager
+from answer_cache import normalize_question
+from oplog import atomic_write_json
+from query_cache import QueryCache
+
+
+class ReadWriteLock:
+    """여러 읽기 / 단일 쓰기 잠금
+
+    쓰기가 대기 중이면 새 읽기를 막아 쓰기가 굶지 않도록 합니다. 재진입은 지원하지 않습니다.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read_lock(self) -> Iterator[None]:
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write_lock(self) -> Iterator[None]:
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class KnowledgeService:
+    """앱이 사용하는 단일 지식 저장/검색/백업 서비스
+
+    KnowledgeManager(저장·색인·검색)와 GitHubManager(원격 백업)를 묶고,
+    프로세스 전체에서 공유되도록 읽기/쓰기 잠금과 version 카운터를 둡니다.
+    쓰기마다 version이 1씩 증가하므로 캐시 무효화 등에 사용할 수 있습니다.
+    """
+
+    # 원격 동기화 상태 (sync_state)
+    SYNC_LOCAL = "local"            # GitHub 미설정, 로컬 데이터만 사용
+    SYNC_REFRESHING = "refreshing"  # 로컬 사본을 보여주며 백그라운드에서 GitHub 스냅샷을 받는 중
+    SYNC_FRESH = "fresh"            # GitHub 스냅샷과 동기화됨
+    SYNC_STALE = "stale"            # GitHub 갱신 실패 또는 로컬 변경을 유지, 로컬 사본 사용 중
+
+    def __init__(self, km: KnowledgeManager, github: Optional[GitHubManager] = None,
+                 default_knowledge_path: str = "./default_knowledge.json",
+                 snapshot_cache_path: str = "./knowledge_snapshot_cache.json"):
+        self.km = km
+        self.github = github
+        self.default_knowledge_path = default_knowledge_path
+        self.snapshot_cache_path = snapshot_cache_path  # 마지막으로 받은 원격 스냅샷의 로컬 사본
+        self.lock = ReadWriteLock()
+        self.version = 0
+        self.query_cache = QueryCache()  # (정규화된 검색어, 개수, 접두어 여부) → 결과, version이 바뀌면 비움
+        self.restored = False  # 시작 시 로컬 로드를 이미 수행했는지 (프로세스당 1회)
+        
+        # 원격 동기화 상태
+        self.sync_state = self.SYNC_LOCAL
+        self.sync_error: Optional[str] = None
+        self.refreshed_count: Optional[int] = None  # 백그라운드 갱신으로 받은 문서 수
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._refresh_lock = threading.Lock()
+        self._remote_info: Optional[Dict] = None  # 원격 스냅샷의 백업 시각과 문서 수
+        
+        # 백업 상태: 마지막으로 원격과 일치했던 version (같으면 백업 생략)
+        self._github_lock = threading.Lock()
+        self._backed_up_version: Optional[int] = None
+        self.last_backup_skipped = False
+        # 원격 스냅샷을 한 번이라도 받았는지 (받기 전에는 로컬 사본으로 원격을 덮어쓰지 않도록 백업 차단)
+        self.remote_synced = False
+        # 마지막으로 원격에 반영된 뒤 로컬에서 쓰기가 있었던 doc_id (갱신 시 받은 스냅샷 위에 다시 적용)
+        self._local_changes: Set[str] = set()
+
+    @contextmanager
+    def read(self) -> Iterator[KnowledgeManager]:
+        """읽기 잠금"""
+        with self.lock.read_lock():
+            yield self.km
+
+    @contextmanager
+    def write(self) -> Iterator[KnowledgeManager]:
+        """쓰기 잠금 (종료 시 version 증가)"""
+        with self.lock.write_lock():
+            try:
+                yield self.km
+            finally:
+                self.version += 1
+
+    # --- 조회 ---
+    def count(self) -> int:
+        with self.read() as km:
+            return len(km.json_db["documents"])
+
+    def search(self, query: str, n_results: int = 5, prefix: bool = False) -> List[SearchHit]:
+        """검색 (같은 version에서 같은 검색어는 캐시된 결과 반환)"""
+        key = (normalize_question(query), n_results, prefix)
+        with self.read() as km:
+            version = self.version  # 읽기 잠금 중에는 version이 바뀌지 않음
+            results = self.query_cache.get(key, version)
+            if results is None:
+                try:
+                    results = km.search_knowledge(query, n_results, prefix, strict=True)
+                except Exception as e:
+                    # 실패한 검색은 캐시하지 않음 (다음 요청에서 다시 검색)
+                    print(f"Error searching knowledge: {e}")
+                    return []
+                self.query_cache.put(key, version, results)
+            return list(results)
+
+    def get_all(self) -> List[Dict]:
+        with self.read() as km:
+            return km.get_all_knowledge()
+
+    def get_stats(self) -> Dict:
+        with self.read() as km:
+            return km.get_stats()
+
+    def list_summaries(self, offset: int = 0, limit: int = 20) -> Tuple[List[Dict], int]:
+        with self.read() as km:
+            return km.list_summaries(offset, limit)
+
+    def get_document(self, doc_id: str) -> Optional[Document]:
+        with self.read() as km:
+            return km.get_document(doc_id)
+
+    def build_context(self, question: str, results: List[Dict],
+                      max_chars: int = DEFAULT_CONTEXT_CHARS) -> Tuple[str, List[Dict]]:
+        """AI 프롬프트용 자료 (글자 예산 안의 패시지, 보낸 패시지 목록)"""
+        with self.read() as km:
+            return build_context(question, results, km.passages, max_chars)
+
+    # --- 쓰기 ---
+    def add(self, title: str, content: str, category: str, tags: str = "") -> bool:
+        with self.write() as km:
+            ok = km.add_knowledge(title, content, category, tags)
+            if ok:
+                self._local_changes.add(km.last_added_id)
+            return ok
+
+    def update(self, doc_id: str, title: str, content: str, category: str, tags: str = "") -> bool:
+        with self.write() as km:
+            if doc_id not in km.json_db["documents"]:
+                return False
+            self._local_changes.add(doc_id)
+            return km.update_knowledge(doc_id, title, content, category, tags)
+
+    def delete(self, doc_id: str) -> bool:
+        with self.write() as km:
+            if doc_id not in km.json_db["documents"]:
+                return False
+            self._local_changes.add(doc_id)
+            return km.delete_knowledge(doc_id)
+
+    # --- 백업/복원 ---
+    def last_error(self) -> Optional[str]:
+        return self.github.get_last_error() if self.github else "GitHub 토큰이 설정되지 않았습니다"
+
+    def backup(self) -> bool:
+        """변경분 백업 (마지막 백업 이후 쓰기가 없으면 네트워크 요청 없이 건너뜀)"""
+        if self.github is None:
+            return False
+        if not self.remote_synced:
+            # 원격 스냅샷을 받기 전의 로컬 사본(기본 문서, 지난 사본)으로 원격을 덮어쓰지 않음
+            if self.sync_state == self.SYNC_REFRESHING:
+                self.github.last_error = "GitHub에서 최신 지식을 불러오는 중입니다. 잠시 후 다시 시도하세요"
+            else:
+                self.github.last_error = "GitHub에서 최신 지식을 아직 받지 못해 백업할 수 없습니다. 동기화를 다시 시도하세요"
+            return False
+        with self._github_lock:
+            self.last_backup_skipped = False
+            if self._backed_up_version == self.version:
+                self.last_backup_skipped = True
+                return True
+            with self.read() as km:
+                version = self.version
+                ok = self.github.backup_incremental(km)
+                if ok:
+                    self._local_changes.clear()
+            if ok:
+                self._backed_up_version = version
+                self.last_backup_skipped = self.github.last_backup_skipped
+                if not self.last_backup_skipped:
+                    self._remote_info = {"backup_time": datetime.now().isoformat(), "total_documents": self.count()}
+            return ok
+
+    def restore(self) -> bool:
+        """원격 스냅샷으로 전체 복원"""
+        if self.github is None:
+            return False
+        with self._github_lock:
+            backup_data = self.github.fetch_snapshot()
+            if backup_data is None:
+                return False
+            with self.write() as km:
+                ok = self.github.apply_snapshot(km, backup_data)
+                if ok:
+                    # 명시적 전체 복원이므로 로컬 변경은 버림
+                    self._local_changes.clear()
+                # 이 쓰기가 끝난 뒤의 version (잠금을 놓은 뒤 읽으면 그 사이의 다른 쓰기까지 백업된 것으로 보임)
+                version = self.version + 1
+            if ok:
+                self._backed_up_version = version
+                self.remote_synced = True
+                self._remember_snapshot(backup_data)
+            return ok
+
+    def backup_info(self) -> Optional[Dict]:
+        """원격 스냅샷의 백업 시각과 문서 수 (시작 시 갱신·백업·복원에서 알게 된 값, 모르면 None)"""
+        return self._remote_info
+
+    def start(self):
+        """프로세스 시작 시 1회: 로컬 데이터로 즉시 시작하고 GitHub 갱신은 백그라운드로
+
+        로컬 DB가 비어 있으면 마지막으로 받은 스냅샷 사본(snapshot_cache_path)을,
+        그것도 없으면 default_knowledge.json을 넣습니다. 첫 화면은 GitHub 응답을 기다리지 않습니다.
+        """
+        if self.restored:
+            return
+        with self.write() as km:
+            # 다른 세션이 잠금을 기다리는 동안 이미 로드했을 수 있음
+            if self.restored:
+                return
+            if not km.json_db["documents"] and not self._load_snapshot_cache(km):
+                self._load_default_knowledge(km)
+            self.restored = True
+        self.refresh_async()
+
+    def refresh_async(self) -> bool:
+        """백그라운드 스레드에서 GitHub 스냅샷으로 갱신 시작 (이미 진행 중이면 False)"""
+        if self.github is None:
+            return False
+        with self._refresh_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return False
+            self.sync_state = self.SYNC_REFRESHING
+            self.sync_error = None
+            self._refresh_thread = threading.Thread(target=self._refresh, name="knowledge-refresh", daemon=True)
+            self._refresh_thread.start()
+            return True
+
+    def _refresh(self):
+        with self._github_lock:
+            backup_data = self.github.fetch_snapshot()
+            if backup_data is None:
+                if self.github.snapshot_missing:
+                    # 원격에 아직 스냅샷이 없음: 로컬 데이터가 기준이며 첫 백업은 전체 스냅샷
+                    self.remote_synced = True
+                    self.refreshed_count = None
+                    self.sync_state = self.SYNC_FRESH
+                    return
+                self.sync_error = self.github.get_last_error()
+                self.sync_state = self.SYNC_STALE
+                return
+            self._remember_snapshot(backup_data)
+            with self.write() as km:
+                # 원격에 아직 반영되지 않은 로컬 쓰기는 받은 스냅샷 위에 다시 적용 (없으면 None = 삭제)
+                local = km.export_documents()
+                local_changes = {doc_id: local.get(doc_id) for doc_id in self._local_changes}
+                ok = self.github.apply_snapshot(km, backup_data, local_changes)
+                version = self.version + 1  # 이 쓰기가 끝난 뒤의 version
+            if ok:
+                if not local_changes:
+                    self._backed_up_version = version
+                self.remote_synced = True
+                self.refreshed_count = len(backup_data["knowledge_db"].get("documents", {}))
+                self.sync_state = self.SYNC_FRESH
+            else:
+                self.sync_error = self.github.get_last_error()
+                self.sync_state = self.SYNC_STALE
+
+    def _remember_snapshot(self, backup_data: Dict):
+        """원격 스냅샷 정보를 기록하고 다음 시작을 위해 로컬 사본으로 저장"""
+        self._remote_info = {
+            "backup_time": backup_data.get("backup_time"),
+            "total_documents": backup_data.get("total_documents", 0)
+        }
+        try:
+            atomic_write_json(self.snapshot_cache_path, backup_data)
+        except OSError as e:
+            print(f"Error saving snapshot cache: {e}")
+
+    def _load_snapshot_cache(self, km: KnowledgeManager) -> int:
+        """로컬 스냅샷 사본으로 로드 (로드한 문서 수, 없거나 읽을 수 없으면 0)"""
+        try:
+            with open(self.snapshot_cache_path, 'r', encoding='utf-8') as f:
+                backup_data = json.load(f)
+            documents = backup_data["knowledge_db"]["documents"]
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            print(f"Error loading snapshot cache: {e}")
+            return 0
+        km.import_documents(documents)
+        self._remote_info = {
+            "backup_time": backup_data.get("backup_time"),
+            "total_documents": backup_data.get("total_documents", len(documents))
+        }
+        return len(documents)
+
+    def _load_default_knowledge(self, km: KnowledgeManager):
+        try:
+            with open(self.default_knowledge_path, 'r', encoding='utf-8') as f:
+                default_docs = json.load(f)
+        except Exception as e:
+            print(f"Error loading default knowledge: {e}")
+            return
+        now = datetime.now().isoformat()
+        km.import_documents({
+            f"default_{i+1}": {**doc, "created_at": now}
+            for i, doc in enumerate(default_docs)
+        })
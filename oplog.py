@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+from typing import Dict, Iterator
+
+
+def atomic_write_json(path: str, data, indent: int = 2):
+    """임시 파일에 쓴 뒤 rename으로 교체 (중간에 죽어도 파일이 깨지지 않음)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class OperationLog:
+    """추가 전용(JSONL) 작업 로그
+
+    한 줄에 작업 하나({"op": "put" | "delete", ...})를 기록하고 매번 fsync 합니다.
+    스냅샷 저장(압축) 후에는 truncate()로 비웁니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._repair()
+        self.count = sum(1 for _ in self.replay())
+
+    def _repair(self):
+        """쓰다 만 마지막 줄을 잘라내 이후 추가가 깨진 줄에 이어 붙지 않게 함"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+                print(f"Truncated torn operation log entry in {self.path}")
+
+    def append(self, op: Dict):
+        """작업 한 줄 추가 후 디스크에 동기화"""
+        line = json.dumps(op, ensure_ascii=False) + "\n"
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self.count += 1
+
+    def replay(self) -> Iterator[Dict]:
+        """기록된 작업을 순서대로 반환 (쓰다 만 마지막 줄은 무시)"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Skipping torn operation log entry in {self.path}")
+                    break
+
+    def truncate(self):
+        """로그 비우기 (스냅샷에 반영된 이후)"""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self.count = 0
@@ -0,0 +1,46 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class QueryCache:
+    """검색 결과 LRU 캐시
+
+    저장소 version과 함께 저장하며, version이 바뀌면(쓰기 발생) 전체를 비웁니다.
+    같은 검색어로 화면이 다시 그려질 때(다른 위젯 조작 등) 검색을 반복하지 않습니다.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, version: int):
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key: Hashable, version: int):
+        with self._lock:
+            self._check_version(version)
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, version: int, value):
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
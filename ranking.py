@@ -0,0 +1,156 @@
+import heapq
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 필드 가중치와 길이 정규화 계수 (제목/태그에 더 높은 가중치)
+DEFAULT_FIELD_WEIGHTS = {"title": 3.0, "category": 1.5, "tags": 2.0, "content": 1.0}
+DEFAULT_FIELD_B = {"title": 0.5, "category": 0.0, "tags": 0.5, "content": 0.75}
+
+
+class BM25FRanker:
+    """BM25F 랭킹 엔진
+
+    문서별 필드 길이(NumPy 배열), 평균 필드 길이, 문서 빈도(df)와 IDF 표를
+    쓰기 시점에 증분 갱신하고, 질의 시에는 포스팅 길이에 비례하는 배열 연산만
+    수행합니다.
+    """
+
+    def __init__(self, fields: Iterable[str], k1: float = 1.2,
+                 field_weights: Optional[Dict[str, float]] = None,
+                 field_b: Optional[Dict[str, float]] = None):
+        self.fields = tuple(fields)
+        self.k1 = k1
+        self.field_weights = {**DEFAULT_FIELD_WEIGHTS, **(field_weights or {})}
+        self.field_b = {**DEFAULT_FIELD_B, **(field_b or {})}
+        self.reset()
+
+    def reset(self):
+        self.row_of: Dict[str, int] = {}  # doc_id → 배열 행 번호
+        self.doc_of: List[Optional[str]] = []
+        self._free_rows: List[int] = []
+        self.field_lengths = {field: np.zeros(16, dtype=np.float64) for field in self.fields}
+        self.total_lengths = {field: 0.0 for field in self.fields}
+        self.df: Counter = Counter()  # 색인어 → 포함 문서 수 (필드 무관)
+        self._idf: Dict[str, float] = {}  # IDF 표 (문서 수가 바뀌면 다시 계산)
+        self._idf_n = -1
+        self._arrays: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]] = {}  # 포스팅 배열 캐시
+
+    @property
+    def doc_count(self) -> int:
+        return len(self.row_of)
+
+    def _allocate_row(self, doc_id: str) -> int:
+        if self._free_rows:
+            row = self._free_rows.pop()
+            self.doc_of[row] = doc_id
+        else:
+            row = len(self.doc_of)
+            self.doc_of.append(doc_id)
+            capacity = len(self.field_lengths[self.fields[0]])
+            if row >= capacity:
+                for field in self.fields:
+                    grown = np.zeros(capacity * 2, dtype=np.float64)
+                    grown[:capacity] = self.field_lengths[field]
+                    self.field_lengths[field] = grown
+        self.row_of[doc_id] = row
+        return row
+
+    def _invalidate(self, doc_terms: Dict[str, Counter]):
+        for field, counts in doc_terms.items():
+            for term in counts:
+                self._arrays.pop((field, term), None)
+                self._idf.pop(term, None)
+
+    def on_add(self, doc_id: str, doc_terms: Dict[str, Counter]):
+        """문서 색인 시 통계 갱신"""
+        row = self._allocate_row(doc_id)
+        for field in self.fields:
+            length = float(sum(doc_terms[field].values()))
+            self.field_lengths[field][row] = length
+            self.total_lengths[field] += length
+        for term in set().union(*doc_terms.values()):
+            self.df[term] += 1
+        self._invalidate(doc_terms)
+
+    def on_remove(self, doc_id: str, doc_terms: Dict[str, Counter]):
+        """문서 제거 시 통계 갱신"""
+        row = self.row_of.pop(doc_id)
+        for field in self.fields:
+            self.total_lengths[field] -= self.field_lengths[field][row]
+            self.field_lengths[field][row] = 0.0
+        for term in set().union(*doc_terms.values()):
+            self.df[term] -= 1
+            if self.df[term] <= 0:
+                del self.df[term]
+        self.doc_of[row] = None
+        self._free_rows.append(row)
+        self._invalidate(doc_terms)
+
+    def idf(self, term: str) -> float:
+        """BM25 IDF (문서 수가 바뀐 경우에만 표 전체를 비움)"""
+        n = self.doc_count
+        if n != self._idf_n:
+            self._idf = {}
+            self._idf_n = n
+        value = self._idf.get(term)
+        if value is None:
+            df = self.df.get(term, 0)
+            value = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+            self._idf[term] = value
+        return value
+
+    def _posting_arrays(self, field: str, term: str, postings: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+        key = (field, term)
+        cached = self._arrays.get(key)
+        if cached is None:
+            rows = np.fromiter((self.row_of[doc_id] for doc_id in postings), dtype=np.int64, count=len(postings))
+            tfs = np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            cached = (rows, tfs)
+            self._arrays[key] = cached
+        return cached
+
+    def score(self, query_terms: Iterable[str],
+              postings: Dict[str, Dict[str, Dict[str, int]]]) -> Tuple[np.ndarray, np.ndarray]:
+        """질의 색인어들의 BM25F 점수 (행 번호 배열, 점수 배열)"""
+        n = self.doc_count
+        if n == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        all_rows = []
+        all_scores = []
+        for term in set(query_terms):
+            rows_parts = []
+            weight_parts = []
+            for field in self.fields:
+                field_postings = postings[field].get(term)
+                if not field_postings:
+                    continue
+                rows, tfs = self._posting_arrays(field, term, field_postings)
+                avg_length = self.total_lengths[field] / n or 1.0
+                b = self.field_b[field]
+                norm = 1.0 - b + b * self.field_lengths[field][rows] / avg_length
+                rows_parts.append(rows)
+                weight_parts.append(self.field_weights[field] * tfs / norm)
+            if not rows_parts:
+                continue
+
+            # 필드별 가중 빈도를 문서 단위로 합산한 뒤 포화 함수 적용
+            term_rows, inverse = np.unique(np.concatenate(rows_parts), return_inverse=True)
+            weighted_tf = np.bincount(inverse, weights=np.concatenate(weight_parts))
+            all_rows.append(term_rows)
+            all_scores.append(self.idf(term) * weighted_tf * (self.k1 + 1.0) / (self.k1 + weighted_tf))
+
+        if not all_rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        doc_rows, inverse = np.unique(np.concatenate(all_rows), return_inverse=True)
+        return doc_rows, np.bincount(inverse, weights=np.concatenate(all_scores))
+
+    def top_k(self, query_terms: Iterable[str], postings: Dict[str, Dict[str, Dict[str, int]]],
+              k: int, order: Dict[str, int]) -> List[Tuple[str, float]]:
+        """상위 k개 문서 (heapq.nlargest, 동점은 문서 순서대로)"""
+        rows, scores = self.score(query_terms, postings)
+        candidates = ((self.doc_of[row], score) for row, score in zip(rows.tolist(), scores.tolist()) if score > 0)
+        return heapq.nlargest(k, candidates, key=lambda item: (item[1], -order[item[0]]))
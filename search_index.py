@@ -0,0 +1,179 @@
+import bisect
+import threading
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from ranking import BM25FRanker
+from tokenizer import Analyzer, KoreanAnalyzer
+
+# 인덱싱하는 필드 (검색 점수 계산에 쓰이는 필드와 동일)
+FIELDS = ("title", "category", "tags", "content")
+# 입력 중인 마지막 단어(접두어)를 확장할 최대 색인어 수와 접두어 캐시 크기
+MAX_PREFIX_EXPANSIONS = 32
+PREFIX_CACHE_SIZE = 512
+
+
+def _flat_fields(data: Dict) -> Dict[str, str]:
+    """평면 구조 문서({"title", "category", "tags", "content"})의 필드"""
+    return {field: data.get(field, "") or "" for field in FIELDS}
+
+
+class InvertedIndex:
+    """지식 검색용 역색인
+
+    필드별로 색인어 → {doc_id: 빈도} 포스팅을 유지합니다.
+    색인어는 분석기(tokenizer)가 쓰기 시점에 한 번만 계산하며,
+    질의는 포스팅 조회(집합 연산)만으로 처리됩니다.
+    """
+
+    def __init__(self, analyzer: Optional[Analyzer] = None,
+                 fields_of: Optional[Callable[[Dict], Dict[str, str]]] = None, prenormalized: bool = False):
+        self.analyzer = analyzer or KoreanAnalyzer()
+        self.fields_of = fields_of or _flat_fields
+        # fields_of가 이미 normalize_text를 거친 필드를 돌려주면 색인 시 정규화를 생략
+        self.prenormalized = prenormalized
+        self.ranker = BM25FRanker(FIELDS)
+        # 접두어 캐시/색인어 목록은 공유 읽기 잠금 아래의 검색에서도 채워지므로 별도 잠금으로 보호
+        self._prefix_lock = threading.Lock()
+        self._reset()
+        self.source: Optional[Dict] = None  # 색인 대상 documents 딕셔너리
+
+    def _reset(self):
+        self.postings: Dict[str, Dict[str, Dict[str, int]]] = {field: {} for field in FIELDS}
+        self.terms: Dict[str, Dict[str, Counter]] = {}  # doc_id → 필드별 색인어 빈도
+        self._order: Dict[str, int] = {}  # 동점 시 원래 문서 순서를 유지하기 위한 삽입 순번
+        self._next_order = 0
+        self.ranker.reset()
+        self._invalidate_vocabulary()
+
+    def _invalidate_vocabulary(self):
+        self._vocabulary: Optional[List[str]] = None  # 정렬된 전체 색인어 (접두어 검색용, 필요할 때 구성)
+        self._prefix_cache: "OrderedDict[str, List[str]]" = OrderedDict()  # 접두어 → 해당 색인어들
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def build(self, documents: Dict[str, Dict]):
+        """documents 전체로 색인을 새로 구성"""
+        self._reset()
+        self.source = documents
+        for doc_id, data in documents.items():
+            self.add(doc_id, data)
+
+    def add(self, doc_id: str, data: Dict):
+        """문서 추가 (이미 있으면 교체, 기존 순번 유지)"""
+        if doc_id in self.terms:
+            self._unindex(doc_id)
+        else:
+            self._order[doc_id] = self._next_order
+            self._next_order += 1
+
+        fields = self.fields_of(data)
+        doc_terms = {field: Counter(self.analyzer.analyze(fields[field], self.prenormalized)) for field in FIELDS}
+        self.terms[doc_id] = doc_terms
+
+        new_terms = False
+        for field, counts in doc_terms.items():
+            field_postings = self.postings[field]
+            for term, tf in counts.items():
+                docs = field_postings.get(term)
+                if docs is None:
+                    docs = field_postings[term] = {}
+                    new_terms = True
+                docs[doc_id] = tf
+        if new_terms and self._vocabulary is not None:
+            self._invalidate_vocabulary()
+        self.ranker.on_add(doc_id, doc_terms)
+
+    def remove(self, doc_id: str):
+        """문서 제거"""
+        if doc_id in self.terms:
+            self._unindex(doc_id)
+            del self.terms[doc_id]
+            del self._order[doc_id]
+
+    def _unindex(self, doc_id: str):
+        self.ranker.on_remove(doc_id, self.terms[doc_id])
+        for field, counts in self.terms[doc_id].items():
+            field_postings = self.postings[field]
+            for term in counts:
+                docs = field_postings.get(term)
+                if docs is None:
+                    continue
+                docs.pop(doc_id, None)
+                if not docs:
+                    del field_postings[term]
+                    if self._vocabulary is not None:
+                        self._invalidate_vocabulary()
+
+    def analyze_query(self, query: str) -> List[str]:
+        """질의를 색인과 같은 분석기로 분석"""
+        return self.analyzer.analyze(query)
+
+    def expand_prefix(self, prefix: str) -> List[str]:
+        """prefix로 시작하는 색인어 (문서 빈도 내림차순)
+
+        직전에 확장한 더 짧은 접두어가 캐시에 있으면 그 결과만 좁혀 나가므로
+        "조영" → "조영제"처럼 입력이 길어질 때 전체 색인어를 다시 훑지 않습니다.
+        """
+        with self._prefix_lock:
+            cached = self._prefix_cache.get(prefix)
+            if cached is not None:
+                self._prefix_cache.move_to_end(prefix)
+                return cached
+            for cut in range(len(prefix) - 1, 0, -1):
+                base = self._prefix_cache.get(prefix[:cut])
+                if base is not None:
+                    terms = [term for term in base if term.startswith(prefix)]
+                    break
+            else:
+                if self._vocabulary is None:
+                    self._vocabulary = sorted(set().union(*(self.postings[field] for field in FIELDS)))
+                start = bisect.bisect_left(self._vocabulary, prefix)
+                end = bisect.bisect_left(self._vocabulary, prefix + "\U0010ffff")
+                terms = sorted(self._vocabulary[start:end], key=lambda term: -self.ranker.df.get(term, 0))
+            self._prefix_cache[prefix] = terms
+            while len(self._prefix_cache) > PREFIX_CACHE_SIZE:
+                self._prefix_cache.popitem(last=False)
+            return terms
+
+    def analyze_prefix_query(self, query: str) -> List[str]:
+        """마지막 단어를 입력 중인 접두어로 보고 일치하는 색인어로 확장한 질의 색인어"""
+        terms = self.analyze_query(query)
+        if not terms:
+            return terms
+        expansions = self.expand_prefix(terms[-1])[:MAX_PREFIX_EXPANSIONS]
+        return terms[:-1] + (expansions or terms[-1:])
+
+    def term_docs(self, field: str, term: str) -> Dict[str, int]:
+        """field에서 term을 포함한 문서와 빈도"""
+        return self.postings[field].get(term, {})
+
+    def docs_with_all(self, field: str, terms: Iterable[str]) -> Set[str]:
+        """field에 terms를 모두 포함한 문서 (짧은 포스팅부터 교집합)"""
+        lists = []
+        for term in set(terms):
+            docs = self.postings[field].get(term)
+            if not docs:
+                return set()
+            lists.append(docs)
+        if not lists:
+            return set()
+        lists.sort(key=len)
+        result: Set[str] = set(lists[0])
+        for docs in lists[1:]:
+            result.intersection_update(docs)
+            if not result:
+                break
+        return result
+
+    def rank(self, scores: Dict[str, float]) -> List[Tuple[str, float]]:
+        """점수 내림차순, 동점은 문서 순서대로 정렬"""
+        ranked = [(doc_id, score) for doc_id, score in scores.items() if score > 0]
+        ranked.sort(key=lambda item: (-item[1], self._order[item[0]]))
+        return ranked
+
+    def search(self, query: str, n_results: int = 5, prefix: bool = False) -> List[Tuple[str, float]]:
+        """BM25F 점수 상위 n_results개 (doc_id, 점수), prefix=True면 마지막 단어를 접두어로 검색"""
+        terms = self.analyze_prefix_query(query) if prefix else self.analyze_query(query)
+        return self.ranker.top_k(terms, self.postings, n_results, self._order)
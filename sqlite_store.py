@@ -0,0 +1,199 @@
+import json
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import sqlite_utils
+
+# FTS5 bm25() 컬럼 가중치 (title, content, tags 순서)
+FTS_WEIGHTS = (3.0, 1.0, 2.0)
+
+COLUMNS = ("id", "title", "content", "category", "tags", "created_at", "updated_at")
+
+# FTS 트리거가 UPDATE로 동작하도록 INSERT OR REPLACE 대신 UPSERT 구문 사용
+UPSERT_SQL = (
+    f"INSERT INTO documents ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)}) "
+    "ON CONFLICT(id) DO UPDATE SET "
+    + ", ".join(f"{column} = excluded.{column}" for column in COLUMNS[1:])
+)
+
+
+def _to_record(doc_id: str, data: Dict) -> Dict:
+    """JSON DB 문서({"content", "metadata"})를 documents 테이블 행으로 변환"""
+    metadata = data["metadata"]
+    return {
+        "id": doc_id,
+        "title": metadata["title"],
+        "content": data["content"],
+        "category": metadata["category"],
+        "tags": metadata.get("tags", ""),
+        "created_at": metadata.get("created_at", ""),
+        "updated_at": metadata.get("updated_at"),
+    }
+
+
+def _to_document(row: Dict) -> Dict:
+    """documents 테이블 행을 JSON DB 문서 형식으로 변환"""
+    metadata = {
+        "title": row["title"],
+        "category": row["category"],
+        "tags": row["tags"] or "",
+        "created_at": row["created_at"] or "",
+    }
+    if row.get("updated_at"):
+        metadata["updated_at"] = row["updated_at"]
+    return {"content": row["content"], "metadata": metadata}
+
+
+def fts_match_expression(terms: List[str]) -> str:
+    """분석된 색인어를 FTS5 접두어 OR 질의로 변환 ("조영제" → "조영제"* 가 "조영제를"도 매치)"""
+    quoted = []
+    for term in dict.fromkeys(terms):
+        quoted.append('"' + term.replace('"', '""') + '"*')
+    return " OR ".join(quoted)
+
+
+class SQLiteKnowledgeStore:
+    """SQLite(sqlite-utils) 기반 지식 저장소
+
+    documents 테이블(created_at, category 인덱스)과 title/content/tags에 대한
+    FTS5 가상 테이블을 사용합니다. FTS 색인은 트리거로 자동 갱신됩니다.
+    """
+
+    def __init__(self, db_path: str = "./knowledge_database.db"):
+        self.db_path = db_path
+        self.db = sqlite_utils.Database(sqlite3.connect(db_path, check_same_thread=False))
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        if "documents" not in self.db.table_names():
+            self.db["documents"].create({
+                "id": str,
+                "title": str,
+                "content": str,
+                "category": str,
+                "tags": str,
+                "created_at": str,
+                "updated_at": str,
+            }, pk="id")
+            self.db["documents"].create_index(["created_at"])
+            self.db["documents"].create_index(["category"])
+            self.db["documents"].enable_fts(["title", "content", "tags"], fts_version="FTS5", create_triggers=True)
+        if "meta" not in self.db.table_names():
+            self.db["meta"].create({"key": str, "value": str}, pk="key")
+        if "files" not in self.db.table_names():
+            self.db["files"].create({"doc_id": str, "record": str}, pk="doc_id")
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        rows = list(self.db.query("SELECT value FROM meta WHERE key = ?", [key]))
+        return rows[0]["value"] if rows else default
+
+    def set_meta(self, key: str, value: str):
+        self.db.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            [key, value],
+        )
+
+    def _touch(self):
+        self.set_meta("last_updated", datetime.now().isoformat())
+
+    def last_updated(self) -> str:
+        return self.get_meta("last_updated", "N/A")
+
+    def count(self) -> int:
+        return self.db["documents"].count
+
+    def _upsert_rows(self, documents: Dict[str, Dict]):
+        rows = []
+        for doc_id, data in documents.items():
+            record = _to_record(doc_id, data)
+            rows.append([record[column] for column in COLUMNS])
+        self.db.conn.executemany(UPSERT_SQL, rows)
+
+    def upsert(self, doc_id: str, data: Dict):
+        """문서 추가/수정"""
+        with self.db.conn:
+            self._upsert_rows({doc_id: data})
+            self._touch()
+
+    def delete(self, doc_id: str):
+        """문서 삭제"""
+        with self.db.conn:
+            self.db.conn.execute("DELETE FROM documents WHERE id = ?", [doc_id])
+            self._touch()
+
+    def replace_all(self, documents: Dict[str, Dict], files: Optional[Dict[str, Dict]] = None):
+        """전체 문서(와 마크다운 파일 매핑)를 한 트랜잭션으로 교체 (복원 등)"""
+        with self.db.conn:
+            self.db.conn.execute("DELETE FROM documents")
+            self._upsert_rows(documents)
+            if files is not None:
+                self.db.conn.execute("DELETE FROM files")
+                self.db.conn.executemany(
+                    "INSERT INTO files (doc_id, record) VALUES (?, ?)",
+                    [(doc_id, json.dumps(record, ensure_ascii=False)) for doc_id, record in files.items()]
+                )
+            self._touch()
+
+    def load_files(self) -> Dict[str, Dict]:
+        """doc_id → 마크다운 파일 정보"""
+        return {row["doc_id"]: json.loads(row["record"]) for row in self.db.query("SELECT * FROM files")}
+
+    def put_file(self, doc_id: str, record: Optional[Dict]):
+        """마크다운 파일 정보 한 건 저장 (record=None이면 삭제)"""
+        with self.db.conn:
+            if record is None:
+                self.db.conn.execute("DELETE FROM files WHERE doc_id = ?", [doc_id])
+            else:
+                self.db.conn.execute(
+                    "INSERT INTO files (doc_id, record) VALUES (?, ?) "
+                    "ON CONFLICT(doc_id) DO UPDATE SET record = excluded.record",
+                    [doc_id, json.dumps(record, ensure_ascii=False)]
+                )
+
+    def load_documents(self) -> Dict[str, Dict]:
+        """전체 문서를 JSON DB 형식({doc_id: {"content", "metadata"}})으로 로드"""
+        return {row["id"]: _to_document(row) for row in self.db.query("SELECT * FROM documents ORDER BY rowid")}
+
+    def list_ids(self, offset: int = 0, limit: int = -1) -> List[str]:
+        """생성일 최신순 doc_id 한 페이지 (limit=-1이면 끝까지, created_at 인덱스 사용)"""
+        return [row["id"] for row in self.db.query(
+            "SELECT id FROM documents ORDER BY created_at DESC LIMIT ? OFFSET ?", [limit, offset]
+        )]
+
+    def category_counts(self) -> Dict[str, int]:
+        """카테고리별 문서 수 (category 인덱스 사용)"""
+        return {
+            row["category"]: row["n"]
+            for row in self.db.query("SELECT category, COUNT(*) AS n FROM documents GROUP BY category")
+        }
+
+    def search(self, terms: List[str], limit: int = 5) -> List[Tuple[str, float]]:
+        """FTS5 bm25 순위 상위 limit개 (doc_id, 점수)"""
+        if not terms:
+            return []
+        sql = (
+            "SELECT documents.id AS id, bm25(documents_fts, ?, ?, ?) AS rank "
+            "FROM documents_fts JOIN documents ON documents.rowid = documents_fts.rowid "
+            "WHERE documents_fts MATCH ? ORDER BY rank LIMIT ?"
+        )
+        rows = self.db.query(sql, [*FTS_WEIGHTS, fts_match_expression(terms), limit])
+        # bm25()는 낮을수록 관련도가 높으므로 부호를 바꿔 반환
+        return [(row["id"], -row["rank"]) for row in rows]
+
+    def migrate_from_json(self, json_db: Dict) -> int:
+        """JSON 저장소 내용(스냅샷 + 작업 로그 재생 결과)을 한 번만 가져옴 (이미 가져왔으면 0 반환)"""
+        if self.get_meta("migrated_from_json"):
+            return 0
+        documents = json_db.get("documents", {})
+        files = json_db.get("files", {})
+        with self.db.conn:
+            self._upsert_rows(documents)
+            self.db.conn.executemany(
+                "INSERT INTO files (doc_id, record) VALUES (?, ?) "
+                "ON CONFLICT(doc_id) DO UPDATE SET record = excluded.record",
+                [(doc_id, json.dumps(record, ensure_ascii=False)) for doc_id, record in files.items()]
+            )
+            self.set_meta("migrated_from_json", datetime.now().isoformat())
+            self.set_meta("last_updated", json_db.get("last_updated", datetime.now().isoformat()))
+        return len(documents)
@@ -0,0 +1,173 @@
+import base64
+import hashlib
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pytest
+
+# 저장소 루트의 모듈(github_manager 등)을 import 할 수 있게 함
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REPO = "owner/repo"
+
+
+def _sha(kind: str, data: bytes) -> str:
+    return hashlib.sha1(f"{kind} {len(data)}\0".encode("utf-8") + data).hexdigest()
+
+
+class FakeGitHub:
+    """GitHub Git Data API 흉내 (http.server, 브랜치 하나짜리 저장소 한 개)
+
+    blob/tree/commit을 메모리에 보관하고 ref/heads/main을 옮깁니다. knowledge 폴더는
+    contents API 목록과 /raw/{경로} 다운로드로도 읽을 수 있습니다. 받은 요청은
+    requests에 (메서드, 경로)로 남습니다. race_commit을 켜면 커밋이 만들어질 때
+    다른 클라이언트가 먼저 push한 것처럼 브랜치를 옮겨 ref 갱신이 422가 됩니다.
+    """
+
+    def __init__(self):
+        self.blobs = {}    # sha → bytes
+        self.trees = {}    # sha → {경로: blob sha}
+        self.commits = {}  # sha → {"tree", "parents", "message"}
+        self.repo = REPO
+        self.requests = []
+        self.race_commit = False
+        self.head = self._commit(self._tree({}), [], "initial")
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    # --- 저장소 상태 ---
+    def _blob(self, data: bytes) -> str:
+        sha = _sha("blob", data)
+        self.blobs[sha] = data
+        return sha
+
+    def _tree(self, entries: dict) -> str:
+        sha = _sha("tree", json.dumps(entries, sort_keys=True).encode("utf-8"))
+        self.trees[sha] = dict(entries)
+        return sha
+
+    def _commit(self, tree_sha: str, parents: list, message: str) -> str:
+        commit = {"tree": tree_sha, "parents": parents, "message": message}
+        sha = _sha("commit", json.dumps(commit, sort_keys=True).encode("utf-8"))
+        self.commits[sha] = commit
+        return sha
+
+    def push(self, files: dict, message: str = "push"):
+        """다른 클라이언트의 push (경로 → 문자열 내용)"""
+        entries = dict(self.files_at(self.head))
+        entries.update({path: self._blob(content.encode("utf-8")) for path, content in files.items()})
+        self.head = self._commit(self._tree(entries), [self.head], message)
+
+    def files_at(self, commit_sha: str) -> dict:
+        """커밋의 경로 → blob sha"""
+        return self.trees[self.commits[commit_sha]["tree"]]
+
+    def read(self, path: str) -> bytes:
+        return self.blobs[self.files_at(self.head)[path]]
+
+    def calls(self, method: str, suffix: str = "") -> list:
+        return [path for m, path in self.requests if m == method and path.endswith(suffix)]
+
+    # --- HTTP ---
+    def _route(self, method: str, path: str, body):
+        if method == "GET" and path.startswith("/raw/"):
+            data = self.blobs.get(self.files_at(self.head).get(path[len("/raw/"):], ""))
+            return (200, data) if data is not None else (404, {"message": "Not Found"})
+        prefix = f"/repos/{REPO}"
+        if not path.startswith(prefix):
+            return 404, {"message": "Not Found"}
+        path = path[len(prefix):]
+        if method == "GET" and path == "":
+            return 200, {"default_branch": "main"}
+        if method == "GET" and path == "/contents/knowledge":
+            listing = [{"name": p.split("/", 1)[1], "path": p, "sha": sha, "type": "file",
+                        "download_url": f"{self.base_url}/raw/{p}"}
+                       for p, sha in sorted(self.files_at(self.head).items()) if p.startswith("knowledge/")]
+            return (200, listing) if listing else (404, {"message": "Not Found"})
+        if method == "GET" and path == "/git/ref/heads/main":
+            return 200, {"object": {"sha": self.head, "type": "commit"}}
+        if method == "GET" and path.startswith("/git/commits/"):
+            commit = self.commits.get(path.rsplit("/", 1)[1])
+            if commit is None:
+                return 404, {"message": "Not Found"}
+            return 200, {"tree": {"sha": commit["tree"]}, "parents": [{"sha": p} for p in commit["parents"]]}
+        if method == "GET" and path.startswith("/git/trees/"):
+            tree = self.trees.get(path.rsplit("/", 1)[1])
+            if tree is None:
+                return 404, {"message": "Not Found"}
+            return 200, {"tree": [{"path": p, "type": "blob", "mode": "100644", "sha": sha}
+                                  for p, sha in sorted(tree.items())]}
+        if method == "POST" and path == "/git/blobs":
+            return 201, {"sha": self._blob(base64.b64decode(body["content"]))}
+        if method == "POST" and path == "/git/trees":
+            entries = dict(self.trees[body["base_tree"]])
+            for item in body["tree"]:
+                if "content" in item:
+                    entries[item["path"]] = self._blob(item["content"].encode("utf-8"))
+                elif item["sha"] in self.blobs:
+                    entries[item["path"]] = item["sha"]
+                else:
+                    return 422, {"message": "tree.sha is not a valid blob"}
+            return 201, {"sha": self._tree(entries)}
+        if method == "POST" and path == "/git/commits":
+            sha = self._commit(body["tree"], body["parents"], body["message"])
+            if self.race_commit:
+                self.push({"knowledge/other.md": "다른 곳에서 올린 파일\n"}, "concurrent push")
+            return 201, {"sha": sha}
+        if method == "PATCH" and path == "/git/refs/heads/main":
+            if self.head not in self.commits[body["sha"]]["parents"]:
+                return 422, {"message": "Update is not a fast forward"}
+            self.head = body["sha"]
+            return 200, {"object": {"sha": self.head, "type": "commit"}}
+        return 404, {"message": "Not Found"}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                path = urlsplit(self.path).path
+                fake.requests.append((self.command, path))
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                status, payload = fake._route(self.command, path, body)
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = _handle
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake_github():
+    fake = FakeGitHub()
+    fake.start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """저장소 파일(knowledge_database.json, knowledge/ 등)을 임시 폴더에 만들도록 작업 폴더 변경"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,14 @@
+from answer_cache import AnswerCache
+
+DOCS = [{"id": "doc1", "title": "조영제", "content": "부작용 대응", "category": "안전수칙", "tags": ""}]
+
+
+def test_answers_are_cached_per_model(tmp_path):
+    path = str(tmp_path / "answer_cache.json")
+    cache = AnswerCache(path)
+    cache.put("조영제 부작용?", DOCS, "실제 답변", "gemini-2.0-flash-exp")
+
+    assert cache.get("조영제 부작용", DOCS, "gemini-2.0-flash-exp") == "실제 답변"
+    assert cache.get("조영제 부작용", DOCS, "fake") is None
+    # 재시작 후에도 모델별로 유지
+    assert AnswerCache(path).get("조영제 부작용", DOCS, "gemini-2.0-flash-exp") == "실제 답변"
@@ -0,0 +1,89 @@
+import functools
+import os
+import shutil
+
+import pytest
+
+import gemini_stream
+from gemini_stream import FakeGenerativeModel, StreamedAnswer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANSWER = "조영제 부작용은 경미한 반응과 중증 반응으로 나뉩니다."
+
+
+def test_streamed_answer_collects_all_chunks():
+    model = FakeGenerativeModel(ANSWER, chunk_size=5, delay=0)
+    answer = StreamedAnswer(model.generate_content("질문", stream=True))
+
+    assert "".join(answer) == ANSWER
+    assert answer.completed
+    assert answer.text == ANSWER
+
+
+def test_streamed_answer_keeps_partial_text_on_mid_stream_error():
+    model = FakeGenerativeModel(ANSWER, chunk_size=5, delay=0, fail_after=2)
+    answer = StreamedAnswer(model.generate_content("질문", stream=True))
+
+    # 오류를 밖으로 던지지 않고 받은 조각까지만 내보냄
+    assert list(answer) == [ANSWER[:5], ANSWER[5:10]]
+    assert not answer.completed
+    assert isinstance(answer.error, ConnectionError)
+    assert answer.text == ANSWER[:10]
+
+
+def test_fake_model_non_stream_raises_on_failure():
+    assert FakeGenerativeModel(ANSWER, delay=0).generate_content("질문").text == ANSWER
+    with pytest.raises(ConnectionError):
+        FakeGenerativeModel(ANSWER, delay=0, fail_after=1).generate_content("질문")
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """가짜 모델로 실행하는 app.py (작업 폴더는 임시 폴더, GitHub 토큰 없음)"""
+    from streamlit.testing.v1 import AppTest
+
+    shutil.copy(os.path.join(ROOT, "default_knowledge.json"), tmp_path)
+    monkeypatch.chdir(tmp_path)
+
+    def run(question, stream=True, **fake_options):
+        monkeypatch.setattr(gemini_stream, "FakeGenerativeModel",
+                            functools.partial(FakeGenerativeModel, ANSWER, delay=0, **fake_options))
+        at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=30)
+        at.secrets["GEMINI_FAKE_MODEL"] = True
+        at.run()
+        at.toggle[0].set_value(stream)
+        at.text_input[0].input(question).run()
+        assert not at.exception
+        return at
+    return run
+
+
+def _texts(at):
+    return [element.value for element in at.markdown] + [element.value for element in at.error] + \
+        [element.value for element in at.info]
+
+
+def test_app_falls_back_to_search_results_on_mid_stream_error(app):
+    at = app("조영제 부작용", fail_after=1)
+
+    texts = _texts(at)
+    assert any("AI 답변 생성이 중단되었습니다" in text for text in texts)
+    assert any("검색된 원본 자료" in text for text in texts)
+    # 가짜 모델 답변은 캐시하지 않음
+    assert not os.path.exists("answer_cache.json")
+
+
+def test_app_falls_back_to_search_results_when_generation_fails(app):
+    at = app("조영제 부작용", stream=False, fail_after=0)
+
+    texts = _texts(at)
+    assert any("AI 답변 생성 실패" in text for text in texts)
+    assert any("검색된 원본 자료" in text for text in texts)
+
+
+def test_app_fake_model_does_not_use_cache_or_quota(app):
+    at = app("조영제 부작용", stream=False)
+
+    assert any(ANSWER in text for text in _texts(at))
+    assert not os.path.exists("answer_cache.json")
+    assert not os.path.exists("api_usage.json")
@@ -0,0 +1,142 @@
+import pytest
+
+from github_manager import GitHubManager
+
+
+@pytest.fixture
+def github(fake_github):
+    manager = GitHubManager("test-token", fake_github.repo)
+    manager.base_url = fake_github.base_url
+    yield manager
+    manager.session.close()
+
+
+def test_commit_files_puts_all_files_in_one_commit(github, fake_github):
+    files = {
+        "knowledge/a.md": "# 조영제 부작용\n\n두드러기\n",
+        "knowledge/b.md": "# CT 프로토콜\r\n\r\n흉부\r\n",
+    }
+    parent = fake_github.head
+
+    assert github.commit_files(files, "Backup: 2 knowledge files")
+
+    commit = fake_github.commits[fake_github.head]
+    assert commit["parents"] == [parent]
+    assert commit["message"] == "Backup: 2 knowledge files"
+    for path, content in files.items():
+        assert fake_github.read(path) == content.encode("utf-8")
+        assert fake_github.files_at(fake_github.head)[path] == GitHubManager.git_blob_sha(content.encode("utf-8"))
+    assert fake_github.calls("POST", "/git/blobs") == []
+    assert len(fake_github.calls("POST", "/git/trees")) == 1
+    assert len(fake_github.calls("PATCH")) == 1
+
+
+def test_commit_files_without_changes_does_not_commit(github, fake_github):
+    fake_github.push({"knowledge/a.md": "같은 내용\n"})
+    head = fake_github.head
+
+    assert github.commit_files({"knowledge/a.md": "같은 내용\n"}, "Backup")
+
+    assert fake_github.head == head
+    assert fake_github.calls("POST") == []
+    assert fake_github.calls("PATCH") == []
+
+
+def test_commit_files_sends_only_changed_files(github, fake_github):
+    fake_github.push({"knowledge/a.md": "그대로\n", "knowledge/b.md": "이전\n"})
+
+    assert github.commit_files({"knowledge/a.md": "그대로\n", "knowledge/b.md": "수정\n"}, "Backup")
+
+    assert fake_github.read("knowledge/b.md") == "수정\n".encode("utf-8")
+    assert fake_github.read("knowledge/a.md") == "그대로\n".encode("utf-8")
+    assert len(fake_github.commits[fake_github.head]["parents"]) == 1
+
+
+def test_commit_files_uploads_large_blob_separately(github, fake_github):
+    github.INLINE_BLOB_MAX_BYTES = 64
+    large = "대용량 문서 " * 100
+    small = "작은 문서\n"
+
+    assert github.commit_files({"knowledge/large.md": large, "knowledge/small.md": small}, "Backup")
+
+    assert len(fake_github.calls("POST", "/git/blobs")) == 1
+    assert fake_github.read("knowledge/large.md") == large.encode("utf-8")
+    assert fake_github.read("knowledge/small.md") == small.encode("utf-8")
+
+
+def test_commit_files_reports_ref_conflict(github, fake_github):
+    fake_github.race_commit = True
+
+    assert not github.commit_files({"knowledge/a.md": "내 변경\n"}, "Backup")
+
+    assert "commit_files(update ref) failed: 422" in github.get_last_error()
+    # 먼저 push된 커밋은 그대로 남고 내 파일은 브랜치에 들어가지 않음
+    assert fake_github.commits[fake_github.head]["message"] == "concurrent push"
+    assert "knowledge/a.md" not in fake_github.files_at(fake_github.head)
+
+
+@pytest.fixture
+def synced(github, fake_github, workdir):
+    """원격 knowledge 파일 두 개를 받아 둔 상태 (manifest에 기준 sha 기록됨)"""
+    fake_github.push({"knowledge/a.md": "# A\r\n\r\n원래 내용\r\n", "knowledge/b.md": "# B\n\n원래 내용\n"})
+    assert github.sync_from_github()
+    return workdir / "knowledge"
+
+
+def test_sync_downloads_only_remote_changes(github, fake_github, synced):
+    assert (synced / "a.md").read_bytes() == "# A\r\n\r\n원래 내용\r\n".encode("utf-8")
+
+    downloads = len(fake_github.calls("GET", ".md"))
+    assert github.sync_from_github()
+    assert len(fake_github.calls("GET", ".md")) == downloads  # 같으면 받지 않음
+
+    fake_github.push({"knowledge/b.md": "# B\n\n원격 수정\n"})
+    assert github.sync_from_github()
+    assert (synced / "b.md").read_text(encoding="utf-8") == "# B\n\n원격 수정\n"
+    assert github.last_sync_conflicts == []
+
+
+def test_sync_keeps_local_changes_and_backup_uploads_them(github, fake_github, synced):
+    (synced / "a.md").write_bytes("# A\r\n\r\n로컬 수정\r\n".encode("utf-8"))
+
+    assert github.sync_from_github()
+    assert (synced / "a.md").read_bytes() == "# A\r\n\r\n로컬 수정\r\n".encode("utf-8")
+
+    assert github.backup_all_knowledge(None)
+    assert fake_github.read("knowledge/a.md") == "# A\r\n\r\n로컬 수정\r\n".encode("utf-8")
+
+    # CRLF 파일도 올린 뒤에는 바뀐 것으로 보지 않음
+    head = fake_github.head
+    assert github.backup_all_knowledge(None)
+    assert fake_github.head == head
+
+
+def test_backup_does_not_revert_remote_changes(github, fake_github, synced):
+    fake_github.push({"knowledge/b.md": "# B\n\n원격 수정\n"})
+
+    assert github.backup_all_knowledge(None)
+    assert fake_github.read("knowledge/b.md") == "# B\n\n원격 수정\n".encode("utf-8")
+
+
+def test_changes_on_both_sides_are_reported_as_conflicts(github, fake_github, synced):
+    (synced / "b.md").write_text("# B\n\n로컬 수정\n", encoding="utf-8")
+    fake_github.push({"knowledge/b.md": "# B\n\n원격 수정\n"})
+
+    assert not github.sync_from_github()
+    assert github.last_sync_conflicts == ["knowledge/b.md"]
+    assert "knowledge/b.md" in github.get_last_error()
+    assert (synced / "b.md").read_text(encoding="utf-8") == "# B\n\n로컬 수정\n"
+
+    assert not github.backup_all_knowledge(None)
+    assert github.last_sync_conflicts == ["knowledge/b.md"]
+    assert fake_github.read("knowledge/b.md") == "# B\n\n원격 수정\n".encode("utf-8")
+
+
+def test_sync_without_manifest_takes_remote(github, fake_github, workdir):
+    fake_github.push({"knowledge/a.md": "# A\n\n원격 내용\n"})
+    (workdir / "knowledge").mkdir()
+    (workdir / "knowledge" / "a.md").write_text("# A\n\n오래된 로컬 사본\n", encoding="utf-8")
+
+    assert github.sync_from_github()
+    assert github.last_sync_conflicts == []
+    assert (workdir / "knowledge" / "a.md").read_text(encoding="utf-8") == "# A\n\n원격 내용\n"
@@ -0,0 +1,173 @@
+import os
+
+import pytest
+
+from context_builder import build_context
+from document import Document
+import knowledge_manager
+from knowledge_manager import KnowledgeManager
+
+
+def _add(km, title, content):
+    assert km.add_knowledge(title, content, "안전수칙", "조영제")
+    return km.last_added_id
+
+
+def _path(km, doc_id):
+    return os.path.join(km.knowledge_dir, km.json_db["files"][doc_id]["name"])
+
+
+@pytest.fixture
+def saves(monkeypatch):
+    """KnowledgeManager._save_json_db 호출 횟수"""
+    calls = []
+    save = KnowledgeManager._save_json_db
+    monkeypatch.setattr(KnowledgeManager, "_save_json_db", lambda km: calls.append(1) or save(km))
+    return calls
+
+
+def _touch(path):
+    """같은 크기로 다시 써도 바뀐 파일로 보이도록 수정 시각을 뒤로 옮김"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_load_existing_knowledge_skips_unchanged_tree(workdir, monkeypatch, saves):
+    km = KnowledgeManager()
+    _add(km, "조영제 부작용", "경미한 반응은 두드러기입니다")
+    documents = km.json_db["documents"]
+
+    # 파일별 오류는 로드 중에 잡히므로 호출 여부를 따로 기록
+    reads = []
+    monkeypatch.setattr(knowledge_manager, "_file_record", lambda *args: reads.append(args[0]))
+    monkeypatch.setattr(knowledge_manager, "parse_markdown", lambda *args: reads.append(args[1]))
+    del saves[:]
+
+    km.load_existing_knowledge()
+    reopened = KnowledgeManager()
+
+    assert saves == [] and reads == []
+    assert reopened.json_db["documents"] == documents
+
+
+def test_load_existing_knowledge_picks_up_modified_file(workdir, saves):
+    km = KnowledgeManager()
+    doc_id = _add(km, "조영제 부작용", "경미한 반응은 두드러기입니다")
+    created_at = km.json_db["documents"][doc_id]["metadata"]["created_at"]
+    path = _path(km, doc_id)
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text.replace("두드러기입니다", "호흡곤란 증상입니다"))
+    _touch(path)
+    del saves[:]
+
+    km.load_existing_knowledge()
+
+    assert saves == [1]
+    metadata = km.json_db["documents"][doc_id]["metadata"]
+    assert km.json_db["documents"][doc_id]["content"] == "경미한 반응은 호흡곤란 증상입니다"
+    assert metadata["created_at"] == created_at and metadata["updated_at"]
+    assert [hit.id for hit in km.search_knowledge("호흡곤란")] == [doc_id]
+
+    del saves[:]
+    km.load_existing_knowledge()
+    assert saves == []
+
+
+def test_load_existing_knowledge_drops_mapping_of_deleted_file(workdir, saves):
+    km = KnowledgeManager()
+    kept = _add(km, "조영제 부작용", "경미한 반응은 두드러기입니다")
+    removed = _add(km, "CT 프로토콜", "흉부 조영 CT 프로토콜")
+    os.remove(_path(km, removed))
+    del saves[:]
+
+    km.load_existing_knowledge()
+
+    assert saves == [1]
+    assert list(km.json_db["files"]) == [kept]
+    assert list(KnowledgeManager().json_db["files"]) == [kept]
+
+    del saves[:]
+    km.load_existing_knowledge()
+    assert saves == []
+
+
+def test_restore_from_files_parses_in_parallel(workdir, monkeypatch):
+    km = KnowledgeManager()
+    doc_ids = [_add(km, f"문서 {i}", f"문서 {i}의 본문 내용") for i in range(6)]
+    monkeypatch.setattr(KnowledgeManager, "PARALLEL_PARSE_MIN_FILES", 2)
+
+    result = km.restore_from_files(max_workers=2)
+
+    assert result["loaded"] == 6 and result["errors"] == []
+    assert {doc_id: km.json_db["documents"][doc_id]["content"] for doc_id in doc_ids} == \
+        {doc_id: f"문서 {i}의 본문 내용" for i, doc_id in enumerate(doc_ids)}
+
+
+def test_parallel_restore_matches_serial_restore(workdir, monkeypatch):
+    km = KnowledgeManager()
+    for i in range(4):
+        _add(km, f"문서 {i}", f"문서 {i}의 본문 내용")
+    with open(os.path.join(km.knowledge_dir, "external.md"), "w", encoding="utf-8") as f:
+        f.write("# 외부 문서\n\n바깥에서 추가한 문서의 본문\n")
+    with open(os.path.join(km.knowledge_dir, "memo.md"), "w", encoding="utf-8") as f:
+        f.write("메모")
+    monkeypatch.setattr(KnowledgeManager, "PARALLEL_PARSE_MIN_FILES", 2)
+
+    serial = km.restore_from_files(max_workers=1)
+    serial_db = {key: km.json_db[key] for key in ("documents", "files")}
+    parallel = km.restore_from_files(max_workers=2)
+
+    assert parallel == serial and serial["skipped"] == ["memo.md"] and serial["loaded"] == 5
+    assert {key: km.json_db[key] for key in ("documents", "files")} == serial_db
+
+
+def test_restore_from_files_keeps_document_of_unreadable_file(workdir):
+    km = KnowledgeManager()
+    kept = _add(km, "조영제 부작용", "두드러기와 가려움 대응")
+    broken = _add(km, "CT 프로토콜", "흉부 조영 CT 프로토콜")
+    with open(_path(km, broken), "wb") as f:
+        f.write(b"# \xff\xfe broken")
+
+    result = km.restore_from_files(max_workers=1)
+
+    assert [error["file"] for error in result["errors"]] == [os.path.basename(_path(km, broken))]
+    assert km.json_db["documents"][broken]["content"] == "흉부 조영 CT 프로토콜"
+    assert km.json_db["documents"][kept]["content"] == "두드러기와 가려움 대응"
+    assert KnowledgeManager().json_db["documents"][broken]["content"] == "흉부 조영 CT 프로토콜"
+
+
+@pytest.mark.parametrize("storage", ["json", "sqlite"])
+def test_listings_return_document_records_newest_first(workdir, storage):
+    km = KnowledgeManager(storage=storage)
+    doc_ids = [_add(km, f"문서 {i}", f"문서 {i}의 본문 내용") for i in range(3)]
+    km.update_knowledge(doc_ids[0], "문서 0 수정", "수정된 본문 내용", "안전수칙")
+
+    documents = km.get_all_knowledge()
+    summaries, total = km.list_summaries(offset=1, limit=1)
+
+    assert all(isinstance(doc, Document) for doc in documents + summaries)
+    assert [doc.id for doc in documents] == doc_ids[::-1]
+    assert documents[-1].title == "문서 0 수정"
+    assert [doc.id for doc in summaries] == [doc_ids[1]] and total == 3
+
+
+@pytest.mark.parametrize("storage", ["json", "sqlite"])
+def test_context_follows_updates_and_imports(workdir, storage):
+    km = KnowledgeManager(storage=storage)
+    doc_id = _add(km, "조영제 부작용", "경미한 반응은 두드러기입니다")
+    other = _add(km, "CT 프로토콜", "흉부 CT 프로토콜 설명")
+
+    km.update_knowledge(doc_id, "조영제 부작용", "중증 반응은 호흡곤란입니다", "안전수칙")
+    context, _ = build_context("조영제 반응", [km.get_document(doc_id)], km.passages)
+    assert "호흡곤란" in context and "두드러기" not in context
+
+    documents = km.export_documents()
+    documents[doc_id]["content"] = "복원된 내용: 혈압 저하 시 의료진 호출"
+    del documents[other]
+    km.import_documents(documents)
+
+    assert len(km.passages) == 1
+    context, _ = build_context("조영제 반응", [km.get_document(doc_id)], km.passages)
+    assert "혈압 저하" in context
@@ -0,0 +1,76 @@
+import copy
+import json
+from contextlib import contextmanager
+
+import pytest
+
+from github_manager import GitHubManager
+from knowledge_manager import KnowledgeManager
+from knowledge_service import KnowledgeService
+
+SNAPSHOT = {"backup_time": "2026-01-01T00:00:00", "total_documents": 1, "knowledge_db": {"documents": {
+    "remote1": {"id": "remote1", "title": "원격 문서", "content": "원격에서 받은 내용입니다", "category": "기타",
+                "tags": "", "created_at": "2026-01-01T00:00:00"},
+}}}
+
+
+class StubGitHub(GitHubManager):
+    """원격 스냅샷 하나를 돌려주고 업로드는 기록만 하는 GitHubManager"""
+
+    def __init__(self, snapshot):
+        super().__init__("test-token", "owner/repo")
+        self.snapshot = snapshot
+        self.uploads = []
+
+    def _fetch_json(self, path, timeout=10, missing_ok=False):
+        return copy.deepcopy(self.snapshot) if path == self.SNAPSHOT_PATH else None
+
+    def _upload_file(self, path, content, commit_message):
+        self.uploads.append((path, json.loads(content)))
+        return True
+
+
+class RacingService(KnowledgeService):
+    """쓰기 잠금을 놓은 직후 다른 사용자의 쓰기가 한 번 끼어드는 서비스"""
+
+    racing_title = None
+
+    @contextmanager
+    def write(self):
+        with super().write() as km:
+            yield km
+        title, self.racing_title = self.racing_title, None
+        if title:
+            self.add(title, "잠금을 놓은 직후 저장된 내용", "기타")
+
+
+def test_failed_search_is_not_cached(workdir, monkeypatch):
+    service = KnowledgeService(KnowledgeManager())
+    service.add("조영제 부작용", "두드러기와 가려움", "안전수칙")
+
+    def broken(*args, **kwargs):
+        raise KeyError("evicted")
+
+    monkeypatch.setattr(service.km.index, "search", broken)
+    assert service.search("조영제") == []
+
+    monkeypatch.undo()
+    monkeypatch.chdir(workdir)
+    assert [hit["title"] for hit in service.search("조영제")] == ["조영제 부작용"]
+
+
+@pytest.mark.parametrize("sync", ["restore", "refresh"])
+def test_write_right_after_sync_is_not_marked_backed_up(workdir, sync):
+    github = StubGitHub(SNAPSHOT)
+    service = RacingService(KnowledgeManager(), github)
+    service.racing_title = "동기화 직후 작성"
+
+    if sync == "restore":
+        assert service.restore()
+    else:
+        service._refresh()
+        assert service.sync_state == KnowledgeService.SYNC_FRESH
+
+    assert service.backup()
+    assert not service.last_backup_skipped
+    assert "동기화 직후 작성" in json.dumps(github.uploads[-1][1], ensure_ascii=False)
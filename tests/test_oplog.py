@@ -0,0 +1,44 @@
+import json
+
+from knowledge_manager import KnowledgeManager
+from oplog import OperationLog
+
+
+def test_torn_last_line_is_dropped_and_appends_stay_readable(tmp_path):
+    path = tmp_path / "ops.log.jsonl"
+    log = OperationLog(str(path))
+    log.append({"op": "put", "id": "a"})
+    log.append({"op": "put", "id": "b"})
+    # 두 번째 기록을 쓰는 중에 죽은 상황
+    data = path.read_bytes()
+    path.write_bytes(data[:-7])
+
+    log = OperationLog(str(path))
+    assert [op["id"] for op in log.replay()] == ["a"]
+    assert log.count == 1
+
+    log.append({"op": "delete", "id": "a"})
+    assert [op["op"] for op in OperationLog(str(path)).replay()] == ["put", "delete"]
+
+
+def test_unsaved_changes_are_replayed_and_compacted(workdir):
+    km = KnowledgeManager()
+    km.add_knowledge("조영제 부작용", "경미한 반응은 두드러기입니다", "안전수칙")
+    kept = km.last_added_id
+    km.add_knowledge("CT 프로토콜", "흉부 CT 프로토콜 설명", "프로토콜")
+    km.delete_knowledge(km.last_added_id)
+    assert km.oplog.count > 0
+    assert not (workdir / "knowledge_database.json").exists()
+
+    # 스냅샷 없이 다시 열어도 로그만으로 같은 상태
+    reopened = KnowledgeManager()
+    assert list(reopened.json_db["documents"]) == [kept]
+
+    # 다음 추가(문서 + 파일 기록)에서 압축 기준에 닿도록 함
+    reopened.COMPACT_EVERY = reopened.oplog.count + 2
+    reopened.add_knowledge("MRI 금기", "심박동기 환자는 확인이 필요합니다", "안전수칙")
+    assert reopened.oplog.count == 0
+    snapshot = json.loads((workdir / "knowledge_database.json").read_text(encoding="utf-8"))
+    assert sorted(snapshot["documents"]) == sorted([kept, reopened.last_added_id])
+    assert (workdir / "knowledge_database.log.jsonl").read_text(encoding="utf-8") == ""
+    assert sorted(KnowledgeManager().json_db["documents"]) == sorted(snapshot["documents"])
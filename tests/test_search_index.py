@@ -0,0 +1,45 @@
+import threading
+import time
+from collections import OrderedDict
+
+import search_index
+from search_index import InvertedIndex
+
+
+class SlowCache(OrderedDict):
+    """조회 직후 다른 스레드에 실행을 넘겨 경쟁 구간을 넓힌 접두어 캐시"""
+
+    def get(self, key, default=None):
+        value = super().get(key, default)
+        time.sleep(0)
+        return value
+
+
+def test_expand_prefix_is_safe_across_threads(monkeypatch):
+    # 캐시보다 조금 많은 접두어를 돌려 써서 한 스레드의 정리(popitem)와
+    # 다른 스레드의 캐시 적중(move_to_end)이 자주 겹치게 함
+    monkeypatch.setattr(search_index, "PREFIX_CACHE_SIZE", 4)
+    index = InvertedIndex()
+    index.build({
+        f"doc{i}": {"title": f"조영제{i} 부작용{i}", "category": "안전수칙", "tags": "", "content": f"단어{i}"}
+        for i in range(50)
+    })
+    index._prefix_cache = SlowCache()
+    prefixes = ["조영제1", "조영제2", "부작용1", "부작용2", "단어1", "단어2"]
+    errors = []
+
+    def worker(offset):
+        try:
+            for _ in range(50):
+                for prefix in prefixes[offset:] + prefixes[:offset]:
+                    assert all(term.startswith(prefix) for term in index.expand_prefix(prefix))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(offset % len(prefixes),)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
@@ -0,0 +1,61 @@
+import json
+import multiprocessing
+import threading
+
+import pytest
+
+import usage_tracker
+from usage_tracker import UsageTracker
+
+pytestmark = pytest.mark.skipif(not usage_tracker.FILE_LOCK_AVAILABLE, reason="fcntl 파일 잠금 필요")
+
+
+def _acquire_many(path, times, daily_limit):
+    tracker = UsageTracker(path, daily_limit=daily_limit, per_minute_limit=10_000)
+    return sum(tracker.acquire() for _ in range(times))
+
+
+def _saved_count(path) -> int:
+    with open(path, 'r') as f:
+        return json.load(f)["count"]
+
+
+def test_concurrent_acquire_across_threads_loses_no_increments(tmp_path):
+    path = str(tmp_path / "api_usage.json")
+    # 세션마다 따로 만든 카운터가 같은 파일을 공유하는 상황
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(_acquire_many(path, 20, 10_000)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(results) == 160
+    assert _saved_count(path) == 160
+
+
+def test_concurrent_acquire_across_processes_stops_at_daily_limit(tmp_path):
+    path = str(tmp_path / "api_usage.json")
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        granted = pool.starmap(_acquire_many, [(path, 25, 60)] * 4)
+
+    assert sum(granted) == 60
+    assert _saved_count(path) == 60
+    assert not UsageTracker(path, daily_limit=60).acquire()
+
+
+def test_release_refunds_daily_count_but_keeps_minute_history(tmp_path):
+    path = str(tmp_path / "api_usage.json")
+    tracker = UsageTracker(path, per_minute_limit=2)
+    assert tracker.acquire()
+    assert tracker.acquire()
+
+    tracker.release()  # 두 번째 생성이 실패한 경우
+
+    assert tracker.count == 1
+    assert _saved_count(path) == 1
+    assert UsageTracker(path).count == 1
+    # 요청은 이미 나갔으므로 분당 한도에는 그대로 포함
+    assert tracker.minute_exhausted()
+    assert not tracker.acquire()
@@ -0,0 +1,36 @@
+import json
+import os
+
+from knowledge_manager import KnowledgeManager
+from vector_index import VectorIndex, _hash_feature
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UNRELATED = {"title": "검사실 번호", "content": "검사실 28 호기 28 번", "category": "기타", "tags": ""}
+
+
+def _default_documents():
+    with open(os.path.join(ROOT, "default_knowledge.json"), encoding="utf-8") as f:
+        return json.load(f) + [UNRELATED]
+
+
+def test_words_and_ngrams_do_not_share_dimensions():
+    # 예전 해싱(2048차원 공유)에서는 "28"과 "#부작용"이 같은 차원이었음
+    assert _hash_feature("28", 2048)[0] < 1024 <= _hash_feature("#부작용", 2048)[0]
+
+
+def test_korean_query_does_not_match_unrelated_document(tmp_path):
+    index = VectorIndex(str(tmp_path / "vectors.npy"))
+    index.sync({doc["title"]: {"content": doc["content"], "metadata": {"title": doc["title"], "tags": doc["tags"]}}
+                for doc in _default_documents()})
+
+    assert [doc_id for doc_id, _ in index.search("부작용시", 3)] == ["조영제 부작용 대응"]
+
+
+def test_hybrid_search_ranks_relevant_document_first(workdir):
+    km = KnowledgeManager(search_mode="hybrid")
+    for doc in _default_documents():
+        km.add_knowledge(doc["title"], doc["content"], doc["category"], doc["tags"])
+
+    assert km.search_knowledge("부작용시")[0]["title"] == "조영제 부작용 대응"
+    # 다시 열어도 작업 로그로 같은 색인을 복원
+    assert KnowledgeManager(search_mode="hybrid").search_knowledge("부작용시")[0]["title"] == "조영제 부작용 대응"
@@ -0,0 +1,137 @@
+import re
+import unicodedata
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+# 한글 음절 범위 (가 ~ 힣)
+HANGUL_BASE = 0xAC00
+HANGUL_END = 0xD7A3
+
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONGSEONG = " ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"
+
+# 한글 구간과 그 외 문자/숫자 구간을 분리 ("ct검사" → "ct", "검사")
+_WORD_RE = re.compile(r"[가-힣]+|[^\W가-힣]+")
+_SPACE_RE = re.compile(r"\s+")
+
+# 조사 목록: (조사, 앞 음절 받침 조건) - True: 받침 있음, False: 받침 없음, None: 무관
+# 긴 조사부터 검사합니다.
+PARTICLES: List[Tuple[str, object]] = [
+    ("에서는", None), ("에게서", None), ("으로는", True), ("으로서", True), ("으로써", True),
+    ("에서", None), ("에게", None), ("께서", None), ("까지", None), ("부터", None),
+    ("처럼", None), ("보다", None), ("으로", True), ("이나", True), ("이랑", True),
+    ("로는", False), ("로서", False), ("로써", False),
+    ("을", True), ("은", True), ("이", True), ("과", True),
+    ("를", False), ("는", False), ("가", False), ("와", False), ("로", False),
+    ("의", None), ("에", None), ("도", None), ("만", None),
+]
+
+# 조사를 떼어낸 뒤 남아야 하는 최소 어간 길이 ("회의" → "회" 같은 오분리 방지)
+MIN_STEM_LENGTH = 2
+
+
+def is_hangul_syllable(ch: str) -> bool:
+    return HANGUL_BASE <= ord(ch) <= HANGUL_END
+
+
+def decompose_hangul(ch: str) -> Tuple[str, str, str]:
+    """한글 음절을 (초성, 중성, 종성) 자모로 분해 (종성이 없으면 빈 문자열)"""
+    code = ord(ch) - HANGUL_BASE
+    cho, rest = divmod(code, 588)
+    jung, jong = divmod(rest, 28)
+    return CHOSEONG[cho], JUNGSEONG[jung], JONGSEONG[jong].strip()
+
+
+def has_final_consonant(ch: str) -> bool:
+    """받침 유무 (한글 음절이 아니면 False)"""
+    return is_hangul_syllable(ch) and bool(decompose_hangul(ch)[2])
+
+
+def strip_particle(word: str) -> str:
+    """한글 단어 끝의 조사를 제거 (받침 조건이 맞을 때만)"""
+    if not word or not is_hangul_syllable(word[-1]):
+        return word
+    for particle, needs_final in PARTICLES:
+        if not word.endswith(particle):
+            continue
+        stem = word[:-len(particle)]
+        if len(stem) < MIN_STEM_LENGTH or not is_hangul_syllable(stem[-1]):
+            continue
+        if needs_final is not None and has_final_consonant(stem[-1]) != needs_final:
+            # '로'는 ㄹ 받침 뒤에도 붙음 (예: 서울로)
+            if not (particle.startswith("로") and decompose_hangul(stem[-1])[2] == "ㄹ"):
+                continue
+        return stem
+    return word
+
+
+def fold_text(text: str) -> str:
+    """NFKC 정규화 + casefold ("ＣＴ" → "ct", "㎖" → "ml", 분해된 한글 자모 → 완성형 음절)"""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def normalize_text(text: str) -> str:
+    """fold_text 후 연속 공백을 한 칸으로 정리 (검색 필드 정규화 캐시와 질의에 사용)"""
+    return _SPACE_RE.sub(" ", fold_text(text)).strip()
+
+
+def words(text: str, normalized: bool = False) -> List[str]:
+    """정규화(fold_text) 후 단어(한글 / 그 외 문자·숫자 연속) 단위로 분리
+
+    normalized=True면 이미 normalize_text를 거친 텍스트로 보고 정규화를 건너뜁니다.
+    """
+    return _WORD_RE.findall(text if normalized else fold_text(text))
+
+
+class Analyzer(ABC):
+    """텍스트를 색인어 목록으로 변환하는 분석기 기본형"""
+    name = "base"
+
+    @abstractmethod
+    def analyze(self, text: str, normalized: bool = False) -> List[str]:
+        """normalized=True: 이미 normalize_text를 거친 텍스트 (정규화 생략)"""
+
+
+class WhitespaceAnalyzer(Analyzer):
+    """조사 처리 없이 단어 단위로만 분리"""
+    name = "whitespace"
+
+    def analyze(self, text: str, normalized: bool = False) -> List[str]:
+        return words(text, normalized)
+
+
+class BigramAnalyzer(Analyzer):
+    """한글 구간은 문자 바이그램, 그 외 단어는 그대로 색인"""
+    name = "bigram"
+
+    def analyze(self, text: str, normalized: bool = False) -> List[str]:
+        terms = []
+        for word in words(text, normalized):
+            if len(word) > 1 and all(is_hangul_syllable(ch) for ch in word):
+                terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+            else:
+                terms.append(word)
+        return terms
+
+
+class KoreanAnalyzer(Analyzer):
+    """한글 단어의 조사를 받침 규칙에 맞춰 제거 ("조영제의", "조영제를" → "조영제")"""
+    name = "korean"
+
+    def analyze(self, text: str, normalized: bool = False) -> List[str]:
+        return [strip_particle(word) for word in words(text, normalized)]
+
+
+ANALYZERS: Dict[str, type] = {
+    WhitespaceAnalyzer.name: WhitespaceAnalyzer,
+    BigramAnalyzer.name: BigramAnalyzer,
+    KoreanAnalyzer.name: KoreanAnalyzer,
+}
+
+
+def get_analyzer(name: str = "korean") -> Analyzer:
+    """이름으로 분석기 생성"""
+    if name not in ANALYZERS:
+        raise ValueError(f"Unknown analyzer: {name}")
+    return ANALYZERS[name]()
@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List
+
+from oplog import atomic_write_json
+
+try:
+    import fcntl
+    FILE_LOCK_AVAILABLE = True
+except ImportError:  # Windows 등: 프로세스 내부 잠금만 사용
+    FILE_LOCK_AVAILABLE = False
+
+# Gemini 무료 사용 한도
+DAILY_LIMIT = 1500
+PER_MINUTE_LIMIT = 15
+
+
+class UsageTracker:
+    """AI API 사용량 카운터
+
+    한도 확인(allowed, count)은 메모리 값만 사용하고, 실제 호출 직전 acquire()에서만
+    파일 잠금 아래 디스크 값을 다시 읽어 합친 뒤 1을 더해 원자적으로 저장합니다.
+    여러 세션/프로세스가 동시에 호출해도 증가분이 사라지거나 한도를 넘지 않습니다.
+    """
+
+    def __init__(self, path: str = "api_usage.json", daily_limit: int = DAILY_LIMIT,
+                 per_minute_limit: int = PER_MINUTE_LIMIT):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self.daily_limit = daily_limit
+        self.per_minute_limit = per_minute_limit
+        self._lock = threading.Lock()
+        self.date = self._today()
+        self._count = 0
+        self._recent: List[float] = []  # 최근 1분 동안의 호출 시각
+        with self._lock:
+            self._merge(self._read())
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now().date().isoformat()
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        if not FILE_LOCK_AVAILABLE:
+            yield
+            return
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read(self) -> Dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading usage file: {e}")
+            return {}
+
+    def _merge(self, usage: Dict):
+        """디스크 값(다른 프로세스의 증가/환불분 포함)을 메모리에 반영
+
+        모든 쓰기는 파일 잠금 아래에서 하므로 오늘 날짜의 디스크 값이 기준입니다.
+        파일이 없거나 읽지 못하면 메모리 값을 유지합니다.
+        """
+        today = self._today()
+        if self.date != today:
+            self.date, self._count = today, 0
+        if usage.get("date") == today:
+            self._count = usage.get("count", 0)
+        elif usage.get("date"):
+            self._count = 0
+        cutoff = time.time() - 60
+        self._recent = sorted(t for t in set(self._recent) | set(usage.get("recent", [])) if t > cutoff)
+
+    def _roll(self):
+        if self.date != self._today():
+            self.date, self._count = self._today(), 0
+        cutoff = time.time() - 60
+        while self._recent and self._recent[0] <= cutoff:
+            self._recent.pop(0)
+
+    @property
+    def count(self) -> int:
+        """오늘 사용량"""
+        with self._lock:
+            self._roll()
+            return self._count
+
+    def daily_exhausted(self) -> bool:
+        return self.count >= self.daily_limit
+
+    def minute_exhausted(self) -> bool:
+        with self._lock:
+            self._roll()
+            return len(self._recent) >= self.per_minute_limit
+
+    def allowed(self) -> bool:
+        """일일/분당 한도 안인지 (메모리 값만 확인)"""
+        return not self.daily_exhausted() and not self.minute_exhausted()
+
+    def _write(self):
+        try:
+            atomic_write_json(self.path, {"count": self._count, "date": self.date, "recent": self._recent},
+                              indent=None)
+        except OSError as e:
+            print(f"Error saving usage file: {e}")
+
+    def acquire(self) -> bool:
+        """호출 1회를 예약 (한도를 넘으면 False, 성공하면 사용량에 반영되어 저장됨)
+
+        호출이 실패해 답변을 받지 못하면 release()로 일일 사용량을 돌려줘야 합니다.
+        """
+        if not self.allowed():
+            return False
+        with self._lock, self._file_lock():
+            self._merge(self._read())
+            if self._count >= self.daily_limit or len(self._recent) >= self.per_minute_limit:
+                return False
+            self._count += 1
+            self._recent.append(time.time())
+            self._write()
+            return True
+
+    def release(self):
+        """acquire()로 예약한 호출이 실패했을 때 일일 사용량 1회 환불
+
+        요청 자체는 API에 도달했을 수 있으므로 분당 호출 기록은 그대로 둡니다.
+        """
+        with self._lock, self._file_lock():
+            self._merge(self._read())
+            if self._count > 0:
+                self._count -= 1
+                self._write()
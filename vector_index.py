@@ -0,0 +1,286 @@
+import hashlib
+import json
+import os
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from context_builder import split_passages
+from oplog import OperationLog, atomic_write_json
+from tokenizer import is_hangul_syllable, strip_particle, words
+
+# 해시 벡터 차원(앞쪽 절반은 단어, 뒤쪽 절반은 글자 n-gram)과 행렬 탐색 블록 크기(행)
+DEFAULT_DIM = 4096
+# 특징 해싱 방식 버전 (바뀌면 저장된 벡터를 다시 계산)
+FEATURE_VERSION = 2
+SEARCH_BATCH_ROWS = 4096
+# 블록마다 문서별 최고 점수 후보로 남길 패시지 수 (n_results 배수)
+CANDIDATES_PER_RESULT = 8
+# 상호 순위 융합(RRF) 상수
+RRF_K = 60
+
+
+def _hash_feature(feature: str, dim: int) -> Tuple[int, float]:
+    """특징 문자열 → (차원, 부호) (프로세스마다 달라지는 hash() 대신 crc32 사용)
+
+    단어와 글자 n-gram("#…")은 서로 다른 절반에 해싱해 "28" 같은 단어가
+    "#부작용" 같은 n-gram과 같은 차원에 겹치지 않게 합니다.
+    """
+    h = zlib.crc32(feature.encode("utf-8"))
+    half = dim // 2
+    offset = half if feature.startswith("#") else 0
+    return offset + h % half, 1.0 if (h >> 31) & 1 == 0 else -1.0
+
+
+def text_features(text: str) -> List[str]:
+    """단어(조사 제거)와 한글 단어의 글자 2/3-gram
+
+    글자 n-gram 덕분에 "조영제를"/"조영제" 또는 "부작용"/"부작용시" 같이
+    표기가 조금 다른 말도 가까운 벡터가 됩니다.
+    """
+    features = []
+    for word in words(text):
+        word = strip_particle(word)
+        features.append(word)
+        if len(word) > 2 and all(is_hangul_syllable(ch) for ch in word):
+            for n in (2, 3):
+                features.extend(f"#{word[i:i + n]}" for i in range(len(word) - n + 1))
+    return features
+
+
+class HashingVectorizer:
+    """순수 NumPy 해시 벡터화 (로그 빈도, L2 정규화)
+
+    어휘 사전이 없어 문서가 바뀌어도 다른 문서의 벡터는 그대로이므로
+    변경된 문서만 다시 계산할 수 있습니다. IDF는 질의 시점에 적용합니다.
+    """
+
+    def __init__(self, dim: int = DEFAULT_DIM):
+        self.dim = dim
+
+    def transform(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in text_features(text):
+            index, sign = _hash_feature(feature, self.dim)
+            vector[index] += sign
+        nonzero = vector != 0
+        vector[nonzero] = np.sign(vector[nonzero]) * (1.0 + np.log(np.abs(vector[nonzero])))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class VectorIndex:
+    """문서 패시지 벡터 색인 (메모리 매핑된 float32 행렬)
+
+    벡터는 path(.npy)에 행 단위로, 행 → (doc_id, 패시지 순번)과 문서별 내용 해시는
+    path와 같은 이름의 .json에 저장됩니다. 문서 한 건 변경은 .json 전체를 다시 쓰지 않고
+    작업 로그(.log.jsonl)에 그 문서의 행과 해시만 추가하며, 일정 개수마다 .json으로 압축합니다.
+    sync()는 내용 해시가 달라진 문서만 다시 임베딩하며, 검색은 블록 단위 행렬-벡터 곱으로
+    문서별 최고 패시지 점수를 구합니다.
+    """
+
+    # 작업 로그가 이만큼 쌓이면 메타데이터(.json)로 압축
+    COMPACT_EVERY = 200
+
+    def __init__(self, path: str = "./knowledge_vectors.npy", vectorizer: Optional[HashingVectorizer] = None):
+        self.path = path
+        self.meta_path = os.path.splitext(path)[0] + ".json"
+        self.log = OperationLog(os.path.splitext(path)[0] + ".log.jsonl")
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self.dim = self.vectorizer.dim
+        self.source: Optional[Dict] = None  # 마지막으로 sync한 documents 딕셔너리
+
+        self.rows: List[Optional[Tuple[str, int]]] = []  # 행 → (doc_id, 패시지 순번), 빈 행은 None
+        self.doc_rows: Dict[str, List[int]] = {}
+        self.doc_hashes: Dict[str, str] = {}
+        self.df = np.zeros(self.dim, dtype=np.float64)  # 차원별 패시지 빈도 (IDF용)
+        self._free_rows: List[int] = []
+        self.matrix: Optional[np.ndarray] = None
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.doc_rows)
+
+    @staticmethod
+    def content_hash(data: Dict) -> str:
+        metadata = data["metadata"]
+        text = "\n".join([metadata["title"], metadata.get("tags", ""), data["content"]])
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    # --- 저장 ---
+    def _load(self):
+        if not (os.path.exists(self.path) and os.path.exists(self.meta_path)):
+            self._open(16)
+            self._save()
+            return
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            matrix = np.load(self.path, mmap_mode="r+")
+            if meta.get("dim") != self.dim or matrix.shape[1] != self.dim:
+                raise ValueError("vector dimension changed")
+            if meta.get("features") != FEATURE_VERSION:
+                raise ValueError("feature hashing changed")
+        except Exception as e:
+            print(f"Rebuilding vector index: {e}")
+            self._open(16)
+            self._save()
+            return
+        self.matrix = matrix
+        self.rows = [tuple(row) if row else None for row in meta["rows"]]
+        self.doc_hashes = meta["hashes"]
+        for row, entry in enumerate(self.rows):
+            if entry is not None:
+                self.doc_rows.setdefault(entry[0], []).append(row)
+        self._replay_log()
+        for row, entry in enumerate(self.rows):
+            if entry is None:
+                self._free_rows.append(row)
+            else:
+                self.df += self.matrix[row] != 0
+
+    def _replay_log(self):
+        """메타데이터 이후의 문서별 변경({"op": "put" | "delete", "id", "rows", "hash"})을 반영"""
+        for op in self.log.replay():
+            for row in self.doc_rows.pop(op["id"], []):
+                self.rows[row] = None
+            self.doc_hashes.pop(op["id"], None)
+            if op["op"] != "put":
+                continue
+            for position, row in enumerate(op["rows"]):
+                if row >= len(self.rows):
+                    self.rows.extend([None] * (row + 1 - len(self.rows)))
+                self.rows[row] = (op["id"], position)
+            self.doc_rows[op["id"]] = list(op["rows"])
+            self.doc_hashes[op["id"]] = op["hash"]
+
+    def _open(self, capacity: int):
+        """capacity 행짜리 새 행렬 파일 생성 (기존 행은 복사)"""
+        old = self.matrix
+        matrix = np.lib.format.open_memmap(self.path + ".tmp", mode="w+", dtype=np.float32,
+                                           shape=(capacity, self.dim))
+        if old is not None:
+            matrix[:len(old)] = old
+        matrix.flush()
+        del matrix
+        os.replace(self.path + ".tmp", self.path)
+        self.matrix = np.load(self.path, mmap_mode="r+")
+
+    def _save(self):
+        """행렬을 먼저 디스크에 내린 뒤 메타데이터 저장 (메타가 행렬보다 앞서지 않게)"""
+        self.matrix.flush()
+        atomic_write_json(self.meta_path, {
+            "dim": self.dim,
+            "features": FEATURE_VERSION,
+            "rows": [list(entry) if entry else None for entry in self.rows],
+            "hashes": self.doc_hashes,
+        }, indent=None)
+        self.log.truncate()
+
+    def _log_change(self, doc_id: str):
+        """문서 한 건의 변경만 작업 로그에 추가 (행렬을 먼저 내림, 일정 개수마다 압축)"""
+        self.matrix.flush()
+        if doc_id in self.doc_rows:
+            self.log.append({"op": "put", "id": doc_id, "rows": self.doc_rows[doc_id],
+                             "hash": self.doc_hashes[doc_id]})
+        else:
+            self.log.append({"op": "delete", "id": doc_id})
+        if self.log.count >= self.COMPACT_EVERY:
+            self._save()
+
+    # --- 갱신 ---
+    def _allocate_row(self) -> int:
+        if self._free_rows:
+            return self._free_rows.pop()
+        row = len(self.rows)
+        self.rows.append(None)
+        if row >= len(self.matrix):
+            self._open(len(self.matrix) * 2)
+        return row
+
+    def _put(self, doc_id: str, data: Dict):
+        self._remove(doc_id)
+        title = data["metadata"]["title"]
+        rows = []
+        for position, passage in enumerate(split_passages(data["content"]) or [""]):
+            row = self._allocate_row()
+            vector = self.vectorizer.transform(f"{title}\n{passage}")
+            self.matrix[row] = vector
+            self.df += vector != 0
+            self.rows[row] = (doc_id, position)
+            rows.append(row)
+        self.doc_rows[doc_id] = rows
+        self.doc_hashes[doc_id] = self.content_hash(data)
+
+    def _remove(self, doc_id: str):
+        for row in self.doc_rows.pop(doc_id, []):
+            self.df -= self.matrix[row] != 0
+            self.matrix[row] = 0.0
+            self.rows[row] = None
+            self._free_rows.append(row)
+        self.doc_hashes.pop(doc_id, None)
+
+    def put(self, doc_id: str, data: Dict):
+        """문서 추가/수정 (해당 문서의 패시지만 다시 임베딩)"""
+        self._put(doc_id, data)
+        self._log_change(doc_id)
+
+    def remove(self, doc_id: str):
+        if doc_id in self.doc_rows:
+            self._remove(doc_id)
+            self._log_change(doc_id)
+
+    def sync(self, documents: Dict[str, Dict]) -> int:
+        """documents와 맞춤 (내용 해시가 달라진 문서만 다시 임베딩, 다시 임베딩한 문서 수)"""
+        changed = 0
+        for doc_id in [doc_id for doc_id in self.doc_rows if doc_id not in documents]:
+            self._remove(doc_id)
+            changed += 1
+        for doc_id, data in documents.items():
+            if self.doc_hashes.get(doc_id) != self.content_hash(data) or doc_id not in self.doc_rows:
+                self._put(doc_id, data)
+                changed += 1
+        self.source = documents
+        if changed:
+            self._save()
+        return changed
+
+    # --- 검색 ---
+    def search(self, query: str, n_results: int = 5) -> List[Tuple[str, float]]:
+        """코사인 유사도(질의 측 IDF 가중) 상위 n_results 문서 (doc_id, 점수)"""
+        n_rows = len(self.rows)
+        n_passages = n_rows - len(self._free_rows)
+        if n_passages == 0:
+            return []
+        idf = np.log((1.0 + n_passages) / (1.0 + self.df)) + 1.0
+        query_vector = self.vectorizer.transform(query) * idf.astype(np.float32)
+        norm = np.linalg.norm(query_vector)
+        if not norm:
+            return []
+        query_vector /= norm
+
+        best: Dict[str, float] = {}
+        limit = n_results * CANDIDATES_PER_RESULT
+        for start in range(0, n_rows, SEARCH_BATCH_ROWS):
+            scores = self.matrix[start:min(start + SEARCH_BATCH_ROWS, n_rows)] @ query_vector
+            candidates = np.flatnonzero(scores > 0)
+            if len(candidates) > limit:
+                candidates = candidates[np.argpartition(scores[candidates], -limit)[-limit:]]
+            for offset in candidates.tolist():
+                entry = self.rows[start + offset]
+                if entry is not None:
+                    score = float(scores[offset])
+                    if score > best.get(entry[0], 0.0):
+                        best[entry[0]] = score
+        ranked = sorted(best.items(), key=lambda item: -item[1])
+        return ranked[:n_results]
+
+
+def reciprocal_rank_fusion(rankings: List[List[Tuple[str, float]]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """여러 순위 목록을 RRF(Σ 1 / (k + 순위))로 합침"""
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, (doc_id, _) in enumerate(ranking, 1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: -item[1])